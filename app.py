@@ -1,9 +1,10 @@
-from flask import Flask, render_template_string
+from flask import Flask, jsonify, render_template_string, request, url_for
 import datetime
 import pytz
-import scripts.stock_in_excel as stock_processor
-import sys
-from contextlib import contextmanager
+from scripts.helper.common_utils import capture_run_logs, configured_locations, unknown_locations
+from scripts.helper.job_queue import JobQueue
+from scripts.report_pipeline import report_locations, run_report_pipeline
+from scripts.stock_runner import run_locations
 import os
 import json
 
@@ -19,6 +20,9 @@ IST = pytz.timezone('Asia/Kolkata')
 LOGS_DIR = "logs"
 os.makedirs(LOGS_DIR, exist_ok=True)
 
+# Background runs started with POST /stock and POST /reports
+job_queue = JobQueue()
+
 def save_logs_to_file(logs, location):
     """Save logs to a JSON file with timestamp"""
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -27,7 +31,7 @@ def save_logs_to_file(logs, location):
     log_data = {
         "timestamp": datetime.datetime.now(pytz.utc).isoformat(),
         "location": location,
-        "logs": logs
+        "logs": list(logs)
     }
     
     with open(filename, 'w', encoding='utf-8') as f:
@@ -35,30 +39,6 @@ def save_logs_to_file(logs, location):
     
     return filename
 
-@contextmanager
-def capture_logs():
-    """Context manager to capture logs for a single request"""
-    logs = []
-    
-    class LogCapture:
-        def write(self, message):
-            if message.strip():  # Only store non-empty messages
-                logs.append(message.strip())
-        
-        def flush(self):
-            pass
-    
-    # Redirect stdout to our custom handler
-    original_stdout = sys.stdout
-    log_capture = LogCapture()
-    sys.stdout = log_capture
-    
-    try:
-        yield logs
-    finally:
-        # Restore original stdout
-        sys.stdout = original_stdout
-
 # HTML template for the page
 PAGE_TEMPLATE = """
 <!DOCTYPE html>
@@ -126,6 +106,7 @@ PAGE_TEMPLATE = """
         <div class="nav-links">
             <a href="/status">✅ Status</a>
             <a href="/stock">📦 Stock In/Out</a>
+            <a href="/jobs">🗂️ Jobs</a>
         </div>
 
         <hr>
@@ -169,26 +150,142 @@ def home():
 def health_check():
     return "✅ Service is healthy", 200
 
+def parse_locations(value):
+    return [l.strip().lower() for l in (value or "kolkata").split(",") if l.strip()]
+
+def reject_unknown_locations(locations, allowed=None):
+    """A 400 response for locations that aren't configured, before anything touches the disk."""
+    unknown = unknown_locations(locations, allowed)
+    if unknown:
+        return jsonify({"error": f"Unknown locations: {', '.join(unknown)}"}), 400
+    return None
+
+def parse_flag(value):
+    return str(value).lower() in ("1", "true", "yes")
+
 @app.route("/stock", methods=["GET"])
 def run_stock_process():
     global last_run_time
     
-    with capture_logs() as logs:
+    # ?locations=kolkata,surat runs several branches at once
+    locations = parse_locations(request.args.get("locations"))
+    rejected = reject_unknown_locations(locations)
+    if rejected:
+        return rejected
+    # ?force=1 runs even if the items sheet hasn't changed since the last run
+    force = parse_flag(request.args.get("force"))
+    # ?full=1 uploads every line instead of only what changed since the last import
+    full_resync = parse_flag(request.args.get("full"))
+    location_label = "_".join(locations)
+    
+    with capture_run_logs() as logs:
         try:
             # Run the stock process
-            stock_processor.stockInItem("kolkata")
-            last_run_time = datetime.datetime.now(pytz.utc)
-            logs.append("✅ Stock process completed successfully")
+            results = run_locations(locations, force=force, full_resync=full_resync)
+            for location, result in results.items():
+                logs.extend(result["logs"])
+            failed = [location for location, result in results.items() if result["status"] != "succeeded"]
+            if failed:
+                logs.append(f"❌ Stock process failed for: {', '.join(failed)}")
+            else:
+                last_run_time = datetime.datetime.now(pytz.utc)
+                logs.append("✅ Stock process completed successfully")
         except Exception as e:
             logs.append(f"❌ Error: {str(e)}")
         
         # Save logs to file
-        log_file = save_logs_to_file(logs, "kolkata")
+        log_file = save_logs_to_file(logs, location_label)
     
     return render_template_string(PAGE_TEMPLATE,
                                 last_run=last_run_time.astimezone(IST).strftime("%Y-%m-%d %H:%M:%S") if last_run_time else "No runs yet",
                                 logs=logs,
                                 log_file=log_file)
 
+def stock_job(job, locations, force=False, full_resync=False):
+    """Background version of /stock: run the locations and keep logs on the job."""
+    global last_run_time
+    
+    results = run_locations(locations, force=force, full_resync=full_resync)
+    for location, result in results.items():
+        job.logs.extend(result["logs"])
+    failed = [location for location, result in results.items() if result["status"] != "succeeded"]
+    save_logs_to_file(job.logs, "_".join(locations))
+    if failed:
+        raise RuntimeError(f"Stock process failed for: {', '.join(failed)}")
+    
+    last_run_time = datetime.datetime.now(pytz.utc)
+    job.logs.append("✅ Stock process completed successfully")
+    return {location: {k: v for k, v in result.items() if k != "logs"} for location, result in results.items()}
+
+@app.route("/stock", methods=["POST"])
+def start_stock_job():
+    payload = request.get_json(silent=True) or {}
+    requested = payload.get("locations") or request.args.get("locations")
+    if isinstance(requested, list):
+        requested = ",".join(requested)
+    locations = parse_locations(requested)
+    rejected = reject_unknown_locations(locations)
+    if rejected:
+        return rejected
+    force = parse_flag(payload.get("force", request.args.get("force")))
+    full_resync = parse_flag(payload.get("full_resync", request.args.get("full")))
+    
+    job = job_queue.submit(
+        "stock", stock_job,
+        {"locations": locations, "force": force, "full_resync": full_resync},
+        key=(tuple(locations), force, full_resync)
+    )
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for("job_status", job_id=job.id)
+    }), 202
+
+def reports_job(job, locations=None, reports=None, force=False):
+    """Parse every location's report exports and load them into BigQuery in one pass."""
+    results = run_report_pipeline(locations, reports, force=force)
+    failed = [f"{location}/{name}" for location, by_report in results.items()
+              for name, result in by_report.items() if result["status"] == "failed"]
+    save_logs_to_file(job.logs, "reports")
+    if failed:
+        raise RuntimeError(f"Report pipeline failed for: {', '.join(failed)}")
+    return results
+
+@app.route("/reports", methods=["POST"])
+def start_reports_job():
+    payload = request.get_json(silent=True) or {}
+    # Without ?locations= every location with report downloads is refreshed
+    requested = payload.get("locations") or request.args.get("locations")
+    if isinstance(requested, str):
+        requested = [l.strip().lower() for l in requested.split(",") if l.strip()]
+    if requested:
+        rejected = reject_unknown_locations(requested, set(report_locations()) | set(configured_locations()))
+        if rejected:
+            return rejected
+    reports = payload.get("reports") or None
+    # ?force=1 reloads exports even if the same file was loaded before
+    force = parse_flag(payload.get("force", request.args.get("force")))
+    
+    job = job_queue.submit(
+        "reports", reports_job, {"locations": requested, "reports": reports, "force": force},
+        key=("reports", tuple(requested or ()), tuple(reports or ()), force)
+    )
+    return jsonify({
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": url_for("job_status", job_id=job.id)
+    }), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/jobs", methods=["GET"])
+def list_jobs():
+    return jsonify([job.to_dict() for job in job_queue.recent()])
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8080)
@@ -0,0 +1,254 @@
+"""Time and peak memory of the stock import hot paths on synthetic data.
+
+    python -m benchmarks.run                        # 1k, 10k and 100k rows, compared to the baseline
+    python -m benchmarks.run --sizes 1k,10k --only reconcile_stock_frame
+    python -m benchmarks.run --save-baseline        # record the current numbers as the baseline
+
+The baseline (benchmarks/baseline.json) is machine-specific and not checked
+in: record it on the machine that runs the comparison, e.g. a CI job that
+saves it from the main branch and compares branches against it. Exits with
+status 1 when any benchmark is slower or uses more memory than the baseline
+by more than --tolerance, so it can gate a deploy.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Measure parsing itself, not the on-disk frame cache
+os.environ.setdefault("FRONO_FRAME_CACHE_MAX_MB", "0")
+
+from benchmarks.synthetic import generate_sheet_values, generate_template, write_template
+from scripts.helper.common_utils import load_dataframe
+from scripts.helper.excel_reader import read_excel_columns
+from scripts.helper.excel_writer import changed_row_positions, write_import_workbook
+import scripts.stock_in_excel as stock
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = "1k,10k,100k"
+# Sheet rows per template row; a busy day touches about a tenth of the catalogue
+SHEET_SHARE = 0.1
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.005
+MIN_MB_DELTA = 1.0
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register fn(ctx) -> (prepare, run): prepare() builds fresh arguments untimed, run(*args) is measured."""
+    def register(fn):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+def parse_size(text):
+    text = text.strip().lower()
+    return int(float(text[:-1]) * 1000) if text.endswith("k") else int(text)
+
+
+class Context:
+    """Synthetic inputs for one size, built lazily and shared by the benchmarks."""
+
+    def __init__(self, rows, workdir):
+        self.rows = rows
+        self.workdir = workdir
+        self.template = generate_template(rows)
+        self.sheet_values = generate_sheet_values(self.template, max(100, int(rows * SHEET_SHARE)))
+        self.sheet_items = stock.parse_sheet_values(self.sheet_values)
+        self.sheet_frame = stock.sheet_items_to_frame(self.sheet_items)
+        self._template_path = None
+
+    @property
+    def template_path(self):
+        if self._template_path is None:
+            self._template_path = write_template(self.template, os.path.join(self.workdir, "template.xlsx"))
+        return self._template_path
+
+    def output_path(self, name="output.xlsx"):
+        return os.path.join(self.workdir, name)
+
+    def filled_template(self):
+        df = self.template.copy()
+        stock.reconcile_stock_frame(df, self.sheet_frame)
+        return df
+
+
+@benchmark("parse_sheet_values")
+def bench_parse_sheet_values(ctx):
+    return (lambda: (ctx.sheet_values,)), stock.parse_sheet_values
+
+@benchmark("split_sheet_data")
+def bench_split_sheet_data(ctx):
+    return (lambda: (ctx.sheet_items,)), stock.split_sheet_data
+
+@benchmark("is_size_in_group")
+def bench_is_size_in_group(ctx):
+    sizes = ctx.template["Size Name"].tolist()
+    groups = [item.size for item in ctx.sheet_items] or ["38-44"]
+
+    def run(sizes, groups):
+        count = len(groups)
+        return sum(stock.is_size_in_group(size, groups[i % count]) for i, size in enumerate(sizes))
+    return (lambda: (sizes, groups)), run
+
+@benchmark("reconcile_stock_frame")
+def bench_reconcile_stock_frame(ctx):
+    return (lambda: (ctx.template.copy(), ctx.sheet_frame)), stock.reconcile_stock_frame
+
+@benchmark("clear_stock_columns")
+def bench_clear_stock_columns(ctx):
+    return (lambda: (ctx.filled_template(),)), stock.clear_stock_columns
+
+@benchmark("template_read")
+def bench_template_read(ctx):
+    return (lambda: (ctx.template_path,)), (lambda path: read_excel_columns(path, skip_blank=False))
+
+@benchmark("template_write_patch")
+def bench_template_write_patch(ctx):
+    filled = ctx.filled_template()
+    changed = changed_row_positions(ctx.template, filled)
+
+    def run(df, output_path):
+        return write_import_workbook(df, output_path, template_path=ctx.template_path,
+                                     changed_rows=changed, mode="patch")
+    return (lambda: (filled, ctx.output_path())), run
+
+@benchmark("template_write_stream")
+def bench_template_write_stream(ctx):
+    filled = ctx.filled_template()
+    return (lambda: (filled, ctx.output_path())), (lambda df, path: write_import_workbook(df, path, mode="stream"))
+
+@benchmark("load_dataframe")
+def bench_load_dataframe(ctx):
+    return (lambda: (ctx.template_path,)), load_dataframe
+
+
+def measure(prepare, run, repeat):
+    """Best wall time over `repeat` runs, then peak traced memory of one more run."""
+    best = float("inf")
+    for _ in range(repeat):
+        args = prepare()
+        start = time.perf_counter()
+        run(*args)
+        best = min(best, time.perf_counter() - start)
+
+    args = prepare()
+    tracemalloc.start()
+    try:
+        run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(best, 6), "peak_mb": round(peak / (1024 * 1024), 3)}
+
+def run_benchmarks(sizes, names=None, repeat=None):
+    """Run the selected benchmarks at every size; returns {"name@rows": {"seconds", "peak_mb"}}."""
+    names = names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results = {}
+    for rows in sizes:
+        with tempfile.TemporaryDirectory(prefix="frono-bench-") as workdir:
+            ctx = Context(rows, workdir)
+            # Fewer repeats where one run already takes seconds
+            runs = repeat or (5 if rows <= 10_000 else 1)
+            for name in names:
+                prepare, run = BENCHMARKS[name](ctx)
+                result = measure(prepare, run, runs)
+                results[f"{name}@{rows}"] = result
+                print(f"{name:30} {rows:>8} rows  {result['seconds']:>10.4f}s  {result['peak_mb']:>9.2f} MB", flush=True)
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of results against baseline as printable lines."""
+    regressions = []
+    for key, result in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        for metric, floor, unit in (("seconds", MIN_SECONDS_DELTA, "s"), ("peak_mb", MIN_MB_DELTA, " MB")):
+            before, after = previous[metric], result[metric]
+            if after > before * (1 + tolerance) and after - before > floor:
+                regressions.append(
+                    f"{key}: {metric} {before:.4f}{unit} -> {after:.4f}{unit} ({after / before - 1:+.0%})"
+                    if before else f"{key}: {metric} 0 -> {after:.4f}{unit}"
+                )
+    return regressions
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("results", {})
+    except FileNotFoundError:
+        return None
+
+def save_baseline(path, results):
+    data = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    existing = load_baseline(path) or {}
+    data["results"] = {**existing, **results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts, e.g. 1k,10k,100k")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--repeat", type=int, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON recorded on this machine")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results into the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth, 0.25 = 25%%")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    # Keep per-row progress logging out of the numbers and the output
+    logging.getLogger("frono").setLevel(logging.WARNING)
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    names = [name.strip() for name in args.only.split(",")] if args.only else None
+    results = run_benchmarks(sizes, names, args.repeat)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        print("\n".join(f"  {line}" for line in regressions))
+        return 1
+    print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Synthetic item templates and sheet rows shaped like the real ones.
+
+The template mirrors FronoCloud's ImportStockItem.xlsx (Item Code/Name,
+Color Code/Name, Size Code/Name, Stock Qty, Cost price; one row per
+design x color x size). Sheet rows mirror the items sheet range Sheet2!A2:F
+(Design No., Color, Size or size group, Qty, Price, Stock In / Out), all as
+strings the way the Sheets API returns them.
+"""
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+
+COLORS = [
+    "T.BLUE", "CHERRY", "GREY", "BLACK", "WHITE", "NAVY", "MAROON", "OLIVE", "PEACH", "RUST",
+    "MUSTARD", "BEIGE", "WINE", "TEAL", "LEMON", "PINK", "COFFEE", "SKY", "RANI", "MINT",
+]
+SIZES = [36, 38, 40, 42, 44, 46, 48, 50]
+SIZE_GROUPS = ["38-44", "40-46", "36-42", "44-50"]
+TEMPLATE_COLUMNS = [
+    "Item Code", "Item Name", "Color Code", "Color Name", "Size Code", "Size Name", "Stock Qty", "Cost price",
+]
+
+
+def generate_template(rows, seed=0):
+    """A template DataFrame with `rows` rows, 4 colors x 4 sizes per design like the real export."""
+    rng = np.random.default_rng(seed)
+    colors_per_design, sizes_per_color = 4, 4
+    designs = -(-rows // (colors_per_design * sizes_per_color))
+
+    design_ids = np.repeat(np.arange(designs), colors_per_design * sizes_per_color)[:rows]
+    # Distinct colors per design so (design, color, size) stays unique as in the export
+    color_ids = np.argsort(rng.random((designs, len(COLORS))), axis=1)[:, :colors_per_design]
+    color_ids = np.repeat(color_ids.ravel(), sizes_per_color)[:rows]
+    size_start = rng.integers(0, len(SIZES) - sizes_per_color + 1, size=designs * colors_per_design)
+    size_ids = (np.repeat(size_start, sizes_per_color) + np.tile(np.arange(sizes_per_color), designs * colors_per_design))[:rows]
+
+    item_names = np.char.add("PK ", design_ids.astype(str))
+    colors = np.array(COLORS)[color_ids]
+    sizes = np.array(SIZES)[size_ids]
+    return pd.DataFrame({
+        "Item Code": np.char.add(item_names, np.char.add(":", (25000 + design_ids).astype(str))),
+        "Item Name": item_names,
+        "Color Code": np.char.add(colors, np.char.add(":", (1300 + color_ids).astype(str))),
+        "Color Name": colors,
+        "Size Code": np.char.add(sizes.astype(str), np.char.add(":", (1900 + size_ids).astype(str))),
+        "Size Name": sizes.astype(float),
+        "Stock Qty": np.nan,
+        "Cost price": np.nan,
+    }, columns=TEMPLATE_COLUMNS)
+
+def generate_sheet_values(template_df, rows, seed=0, group_share=0.3, out_share=0.2, miss_share=0.05):
+    """Raw Sheet2!A2:F rows pointing at template items, some as size groups, some unknown."""
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(template_df), size=rows)
+    sample = template_df.iloc[picks]
+    designs = sample["Item Name"].to_numpy(dtype=object)
+    colors = sample["Color Name"].to_numpy(dtype=object)
+    sizes = sample["Size Name"].astype(int).astype(str).to_numpy(dtype=object)
+
+    groups = rng.random(rows) < group_share
+    sizes[groups] = rng.choice(SIZE_GROUPS, size=int(groups.sum()))
+    missing = rng.random(rows) < miss_share
+    designs[missing] = np.char.add("NEW ", rng.integers(0, 10**6, size=int(missing.sum())).astype(str))
+    qty = rng.integers(1, 500, size=rows).astype(str)
+    price = (rng.integers(100, 5000, size=rows) / 2).astype(str)
+    direction = np.where(rng.random(rows) < out_share, "Stock Out", "Stock In")
+
+    return [list(row) for row in zip(designs, colors, sizes, qty, price, direction)]
+
+def write_template(template_df, path):
+    """Write template_df the way FronoCloud exports it: inline strings and an explicit
+    (empty) cell for every blank value, which the XML patch path in excel_writer relies on."""
+    columns = [_column_letter(i) for i in range(len(template_df.columns))]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _TEMPLATE_PARTS.items():
+            archive.writestr(name, xml)
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            header = "".join(
+                f'<c r="{col}1" s="1" t="inlineStr"><is><t>{escape(str(name))}</t></is></c>'
+                for col, name in zip(columns, template_df.columns)
+            )
+            sheet.write(f'<row r="1">{header}</row>'.encode())
+            for row_number, values in enumerate(template_df.itertuples(index=False, name=None), start=2):
+                cells = "".join(_template_cell(f"{col}{row_number}", value) for col, value in zip(columns, values))
+                sheet.write(f'<row r="{row_number}">{cells}</row>'.encode())
+            sheet.write(b'</sheetData></worksheet>')
+    return path
+
+def _template_cell(ref, value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return f'<c r="{ref}" t="inlineStr" />'
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        number = int(value) if float(value).is_integer() else float(value)
+        return f'<c r="{ref}" t="n"><v>{number}</v></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+def _column_letter(index):
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_TEMPLATE_PARTS = {
+    "[Content_Types].xml": (
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml" />'
+        '<Default Extension="xml" ContentType="application/xml" />'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml" />'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml" />'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml" />'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        f'<Relationships xmlns="{_REL_NS}">'
+        f'<Relationship Type="{_DOC_REL}/officeDocument" Target="xl/workbook.xml" Id="rId1" />'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        f'<workbook xmlns:r="{_DOC_REL}" xmlns="{_MAIN_NS}"><workbookPr />'
+        '<sheets><sheet name="Sheet1" sheetId="1" state="visible" r:id="rId1" /></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'<Relationships xmlns="{_REL_NS}">'
+        f'<Relationship Type="{_DOC_REL}/worksheet" Target="/xl/worksheets/sheet1.xml" Id="rId1" />'
+        f'<Relationship Type="{_DOC_REL}/styles" Target="styles.xml" Id="rId2" />'
+        '</Relationships>'
+    ),
+    # Same two cell formats as the export: default, and the bold bordered header
+    "xl/styles.xml": (
+        f'<styleSheet xmlns="{_MAIN_NS}">'
+        '<fonts count="2"><font><name val="Calibri" /><family val="2" /><sz val="11" /></font><font><b val="1" /></font></fonts>'
+        '<fills count="2"><fill><patternFill /></fill><fill><patternFill patternType="gray125" /></fill></fills>'
+        '<borders count="2"><border><left /><right /><top /><bottom /><diagonal /></border>'
+        '<border><left style="thin" /><right style="thin" /><top style="thin" /><bottom style="thin" /></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" /></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" />'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" applyAlignment="1" xfId="0">'
+        '<alignment horizontal="center" vertical="top" /></xf></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0" /></cellStyles>'
+        '</styleSheet>'
+    ),
+}
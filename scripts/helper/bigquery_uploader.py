@@ -0,0 +1,534 @@
+import datetime
+import hashlib
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from google.cloud import bigquery
+
+from scripts.helper.common_utils import log, submit_in_context
+from scripts.helper.run_state import clear_state, load_state, save_state
+
+
+DEFAULT_DATASET = "frono_2025"
+DATASET_LOCATION = os.getenv("FRONO_BIGQUERY_LOCATION", "asia-south1")
+# Point the client at a local stand-in (e.g. the BigQuery emulator) instead of Google
+BIGQUERY_ENDPOINT = os.getenv("FRONO_BIGQUERY_ENDPOINT")
+BIGQUERY_PROJECT = os.getenv("FRONO_BIGQUERY_PROJECT")
+UPLOAD_WORKERS = int(os.getenv("FRONO_BIGQUERY_UPLOAD_WORKERS", "4"))
+
+# Declared schemas per (unprefixed) table name: [(column, BigQuery type), ...]
+TABLE_SCHEMAS = {}
+# Tables loaded incrementally: table name -> (business key columns, partition date column)
+INCREMENTAL_TABLES = {}
+STAGING_SUFFIX = "__staging"
+# Staging tables expire on their own if a crashed load never dropped them
+STAGING_EXPIRATION = datetime.timedelta(hours=1)
+# Run state (per location) holding the content digest of every partition merged so far
+PARTITION_STATE_PREFIX = "bigquery_partitions_"
+# Legacy unpartitioned tables are rebuilt under MIGRATION_SUFFIX and kept as <name>LEGACY_SUFFIX
+MIGRATION_SUFFIX = "__partitioned"
+LEGACY_SUFFIX = "__unpartitioned"
+# BigQuery reports some types by their standard SQL names
+_TYPE_ALIASES = {"INT64": "INTEGER", "FLOAT64": "FLOAT", "BOOL": "BOOLEAN"}
+_SQL_TYPES = {"INTEGER": "INT64", "FLOAT": "FLOAT64", "BOOLEAN": "BOOL"}
+# (inferred type, existing column type) pairs a load converts on the way in
+_LOADABLE_AS = {("INTEGER", "FLOAT"), ("DATETIME", "DATE")}
+
+_DTYPE_TYPES = (
+    (pd.api.types.is_bool_dtype, "BOOLEAN"),
+    (pd.api.types.is_integer_dtype, "INTEGER"),
+    (pd.api.types.is_float_dtype, "FLOAT"),
+    (lambda dtype: isinstance(dtype, pd.DatetimeTZDtype), "TIMESTAMP"),
+    (pd.api.types.is_datetime64_dtype, "DATETIME"),
+)
+
+
+class BigQueryUploadError(RuntimeError):
+    """Some tables of an upload_many batch failed; the others were loaded.
+
+    `errors` maps each failed table name to its exception and `jobs` holds
+    the finished jobs of the tables that loaded.
+    """
+
+    def __init__(self, errors, jobs, total):
+        self.errors = errors
+        self.jobs = jobs
+        details = "; ".join(f"{table_name}: {e}" for table_name, e in errors.items())
+        super().__init__(f"BigQuery upload failed for {len(errors)} of {total} tables: {details}")
+
+
+def register_schema(table_name, fields):
+    """Declare the BigQuery schema for a table as [(column, type), ...]."""
+    TABLE_SCHEMAS[table_name] = list(fields)
+
+def register_incremental(table_name, key, partition_field):
+    """Load table_name by MERGE on the key columns into a table partitioned by day on partition_field."""
+    INCREMENTAL_TABLES[table_name] = ([key] if isinstance(key, str) else list(key), partition_field)
+
+def infer_schema(df):
+    """Derive a fixed schema from the DataFrame dtypes; anything else is a STRING."""
+    fields = []
+    for column, dtype in df.dtypes.items():
+        field_type = next((name for check, name in _DTYPE_TYPES if check(dtype)), "STRING")
+        fields.append((str(column), field_type))
+    return fields
+
+def _schema_fields(fields):
+    return [bigquery.SchemaField(column, field_type, mode="NULLABLE") for column, field_type in fields]
+
+def _prepare_frame(df, fields):
+    """Cast STRING/DATE columns so mixed object columns load under the declared schema."""
+    string_columns = [column for column, field_type in fields if field_type == "STRING" and column in df]
+    date_columns = [column for column, field_type in fields if field_type == "DATE" and column in df]
+    if not string_columns and not date_columns:
+        return df
+    df = df.copy()
+    for column in string_columns:
+        values = df[column]
+        df[column] = values.astype(str).where(values.notna(), None)
+    for column in date_columns:
+        values = df[column]
+        if not pd.api.types.is_datetime64_any_dtype(values):
+            # Report dates come as dd/mm/yyyy text
+            values = pd.to_datetime(values, errors="coerce", dayfirst=True)
+        df[column] = values.dt.date
+    return df
+
+def _quote(column):
+    return f"`{column}`"
+
+def _field_type(field):
+    return _TYPE_ALIASES.get(field.field_type, field.field_type)
+
+def _cast_column(column, source_type, field_type):
+    """SELECT expression turning a legacy column of source_type into field_type."""
+    name = _quote(column)
+    sql_type = _SQL_TYPES.get(field_type, field_type)
+    if source_type is None:
+        return f"CAST(NULL AS {sql_type}) AS {name}"
+    if source_type == field_type:
+        return name
+    if field_type in ("DATE", "DATETIME", "TIMESTAMP") and source_type == "STRING":
+        # Autodetect kept dd/mm/yyyy report dates as text
+        return (f"COALESCE(SAFE_CAST({name} AS {sql_type}), "
+                f"CAST(PARSE_DATE('%d/%m/%Y', {name}) AS {sql_type})) AS {name}")
+    if field_type == "DATE" and source_type in ("DATETIME", "TIMESTAMP"):
+        return f"DATE({name}) AS {name}"
+    return f"CAST({name} AS {sql_type}) AS {name}"
+
+def _loads_as(field_type, target):
+    """Whether a column inferred as field_type can load into an existing column of type target."""
+    # Any value loads as text, whole numbers as FLOAT and midnight datetimes as DATE
+    return target in (field_type, "STRING") or (field_type, target) in _LOADABLE_AS
+
+def reconcile_fields(table_id, fields, target_types):
+    """Fields with the types an existing table already has; raises ValueError where a load can't convert."""
+    reconciled, conflicts = [], []
+    for column, field_type in fields:
+        target = target_types.get(column, field_type)
+        if not _loads_as(field_type, target):
+            conflicts.append(f"{column} is {field_type}, the table has {target}")
+        reconciled.append((column, target))
+    if conflicts:
+        raise ValueError(f"Column types don't match {table_id}: {'; '.join(conflicts)}")
+    return reconciled
+
+def _partition_dates(df, partition_field):
+    return _prepare_frame(df[[partition_field]], [(partition_field, "DATE")])[partition_field]
+
+def partition_days(dates):
+    """The partition day of each row as an ISO date, "null" for rows without one."""
+    return pd.Series([day.isoformat() if pd.notna(day) else "null" for day in dates], index=dates.index)
+
+def partition_digests(df, days):
+    """Content digest of df's rows per partition day, independent of row order."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return {
+        day: hashlib.sha256(np.sort(row_hashes[positions]).tobytes()).hexdigest()[:16]
+        for day, positions in days.groupby(days.to_numpy()).indices.items()
+    }
+
+
+class BigQueryUploader:
+    """Long-lived BigQuery loader for one location.
+
+    The client is created once, dataset and table lookups are remembered for
+    the life of the uploader, and every load uses a declared schema (from
+    TABLE_SCHEMAS, or derived from the DataFrame dtypes once per table and
+    column layout) instead of autodetect.
+    Pass client= to run against a stand-in.
+    """
+
+    def __init__(self, location="kolkata", dataset_id=DEFAULT_DATASET, client=None,
+                 dataset_location=DATASET_LOCATION, max_workers=UPLOAD_WORKERS):
+        self.location = location
+        self.dataset_id = dataset_id
+        self.dataset_location = dataset_location
+        self.max_workers = max_workers
+        self._client = client
+        self._lock = threading.Lock()
+        self._known_datasets = set()
+        self._known_tables = set()
+        self._targets = {}  # incremental target table id -> {column: type}
+        self._schemas = {}  # (table name, column dtypes) -> fields
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                log("Creating BigQuery client...")
+                self._client = self._create_client()
+            return self._client
+
+    @staticmethod
+    def _create_client():
+        if BIGQUERY_ENDPOINT:
+            from google.api_core.client_options import ClientOptions
+            from google.auth.credentials import AnonymousCredentials
+            return bigquery.Client(
+                project=BIGQUERY_PROJECT or "local",
+                credentials=AnonymousCredentials(),
+                client_options=ClientOptions(api_endpoint=BIGQUERY_ENDPOINT),
+            )
+        return bigquery.Client(project=BIGQUERY_PROJECT) if BIGQUERY_PROJECT else bigquery.Client()
+
+    def table_id(self, table_name, dataset_id=None):
+        # ✅ Add prefix to table name
+        prefixed_table_name = f"{self.location.lower()}_{table_name}"
+        return f"{self.client.project}.{dataset_id or self.dataset_id}.{prefixed_table_name}"
+
+    def ensure_dataset(self, dataset_id=None):
+        """Create the dataset on first use; later calls are answered from memory."""
+        dataset_id = dataset_id or self.dataset_id
+        if dataset_id in self._known_datasets:
+            return
+        dataset_ref = f"{self.client.project}.{dataset_id}"
+        try:
+            self.client.get_dataset(dataset_ref)
+            log(f"📦 Dataset exists: {dataset_id}")
+        except Exception:
+            log(f"📦 Dataset not found: {dataset_id}. Creating...")
+            dataset = bigquery.Dataset(dataset_ref)
+            dataset.location = self.dataset_location
+            self.client.create_dataset(dataset, exists_ok=True)
+            log(f"✅ Created dataset: {dataset_id}")
+        with self._lock:
+            self._known_datasets.add(dataset_id)
+
+    def table_exists(self, table_id):
+        if table_id in self._known_tables:
+            return True
+        try:
+            self.client.get_table(table_id)
+        except Exception:
+            return False
+        with self._lock:
+            self._known_tables.add(table_id)
+        return True
+
+    def schema_for(self, table_name, df):
+        """Declared or inferred fields for a table, derived once per table and column layout."""
+        if table_name in TABLE_SCHEMAS:
+            return TABLE_SCHEMAS[table_name]
+        signature = (table_name, tuple((str(column), str(dtype)) for column, dtype in df.dtypes.items()))
+        with self._lock:
+            fields = self._schemas.get(signature)
+        if fields is not None:
+            return fields
+        fields = infer_schema(df)
+        incremental = INCREMENTAL_TABLES.get(table_name)
+        if incremental:
+            # Partition columns must be dates, whatever pandas made of them
+            partition_field = incremental[1]
+            fields = [(column, "DATE" if column == partition_field and field_type not in
+                       ("DATE", "DATETIME", "TIMESTAMP") else field_type) for column, field_type in fields]
+        with self._lock:
+            self._schemas[signature] = fields
+        return fields
+
+    def ensure_partitioned_table(self, table_id, fields, key, partition_field):
+        """Create the day-partitioned, key-clustered target table if it doesn't exist yet.
+
+        A legacy unpartitioned table (from the old truncating loads) is
+        migrated first. An existing table gets any columns it lacks (e.g. a
+        new key part) added as NULLABLE so the MERGE can insert them, and the
+        fields are adjusted to the types its columns already have.
+        Returns (fields to load with, True when the table was created by this call).
+        """
+        with self._lock:
+            target_types = self._targets.get(table_id)
+        if target_types is not None:
+            return reconcile_fields(table_id, fields, target_types), False
+        try:
+            table = self.client.get_table(table_id)
+        except Exception:
+            table = None
+        if table is not None:
+            if table.time_partitioning is None:
+                table = self.migrate_to_partitioned(table_id, table, fields, key, partition_field)
+            elif table.time_partitioning.field != partition_field:
+                raise ValueError(
+                    f"{table_id} is partitioned by {table.time_partitioning.field or 'ingestion time'}, "
+                    f"not {partition_field}; drop or rebuild it before loading it incrementally"
+                )
+            target_types = {field.name: _field_type(field) for field in table.schema}
+            fields = reconcile_fields(table_id, fields, target_types)
+            missing = [(column, field_type) for column, field_type in fields if column not in target_types]
+            if missing:
+                table.schema = list(table.schema) + _schema_fields(missing)
+                self.client.update_table(table, ["schema"])
+                log(f"➕ Added columns to {table_id}: {', '.join(column for column, _ in missing)}")
+                target_types.update(missing)
+            with self._lock:
+                self._targets[table_id] = target_types
+            return fields, False
+        table = bigquery.Table(table_id, schema=_schema_fields(fields))
+        table.time_partitioning = bigquery.TimePartitioning(
+            type_=bigquery.TimePartitioningType.DAY, field=partition_field
+        )
+        table.clustering_fields = key[:4]
+        self.client.create_table(table, exists_ok=True)
+        log(f"✅ Created partitioned table: {table_id} (by {partition_field}, key {', '.join(key)})")
+        with self._lock:
+            self._targets[table_id] = dict(fields)
+        return fields, True
+
+    def migrate_to_partitioned(self, table_id, table, fields, key, partition_field):
+        """Rebuild a legacy unpartitioned table as a day-partitioned, key-clustered one.
+
+        The rows are copied into a new table with CREATE TABLE ... AS SELECT,
+        keeping column types the load can still write to and casting the
+        others (always the partition column) to the load's types. The legacy
+        table is then renamed to <name>__unpartitioned and the copy takes its
+        name. Raises ValueError when the legacy table lacks a key or
+        partition column.
+        """
+        legacy_types = {field.name: _field_type(field) for field in table.schema}
+        absent = [column for column in [*key, partition_field] if column not in legacy_types]
+        if absent:
+            raise ValueError(
+                f"{table_id} is not partitioned and has no {', '.join(absent)} column; "
+                "drop or rebuild it before loading it incrementally"
+            )
+        declared = dict(fields)
+        columns = []
+        for column, field_type in fields:
+            legacy_type = legacy_types.get(column)
+            if legacy_type and column != partition_field and _loads_as(field_type, legacy_type):
+                columns.append(_quote(column))
+            else:
+                columns.append(_cast_column(column, legacy_type, field_type))
+        columns += [_quote(column) for column in legacy_types if column not in declared]
+        partition = _quote(partition_field)
+        if declared.get(partition_field, "DATE") != "DATE":
+            partition = f"DATE({partition})"
+        name = table_id.rsplit(".", 1)[-1]
+        migrated_id = f"{table_id}{MIGRATION_SUFFIX}"
+        log(f"🔁 Migrating unpartitioned {table_id} to a table partitioned by {partition_field}")
+        self.client.query(
+            f"CREATE OR REPLACE TABLE `{migrated_id}` PARTITION BY {partition} "
+            f"CLUSTER BY {', '.join(map(_quote, key[:4]))} AS\n"
+            f"SELECT {', '.join(columns)} FROM `{table_id}`"
+        ).result()
+        self.client.query(f"ALTER TABLE `{table_id}` RENAME TO `{name}{LEGACY_SUFFIX}`").result()
+        self.client.query(f"ALTER TABLE `{migrated_id}` RENAME TO `{name}`").result()
+        log(f"✅ Migrated {table_id}; the unpartitioned original is kept as {name}{LEGACY_SUFFIX}")
+        return self.client.get_table(table_id)
+
+    def partition_state_name(self, table_id):
+        return PARTITION_STATE_PREFIX + table_id.split(".", 1)[-1]
+
+    def merge_statement(self, table_id, staging_id, fields, key, partition_field, partition_range):
+        """MERGE the staging rows into the target, touching only the partitions they fall in."""
+        columns = [column for column, _ in fields]
+        # Null-safe so rows with a blank key part still match their earlier load
+        on = " AND ".join(f"T.{_quote(column)} IS NOT DISTINCT FROM S.{_quote(column)}" for column in key)
+        if partition_range is not None:
+            start, end = partition_range
+            # Pruned to the delta's days, so the scan follows the delta instead of the history
+            on += (f" AND (T.{_quote(partition_field)} BETWEEN DATE '{start}' AND DATE '{end}'"
+                   f" OR T.{_quote(partition_field)} IS NULL)")
+        updates = ", ".join(f"{_quote(column)} = S.{_quote(column)}" for column in columns if column not in key)
+        return (
+            f"MERGE `{table_id}` T USING `{staging_id}` S ON {on}\n"
+            + (f"WHEN MATCHED THEN UPDATE SET {updates}\n" if updates else "")
+            + f"WHEN NOT MATCHED THEN INSERT ({', '.join(map(_quote, columns))})"
+            f" VALUES ({', '.join(f'S.{_quote(column)}' for column in columns)})"
+        )
+
+    def upload_incremental(self, df, table_name, key=None, partition_field=None, dataset_id=None):
+        """Upsert the new and changed days of df into a day-partitioned table keyed on the business key.
+
+        Every partition day of df is fingerprinted by content, and only the
+        days whose fingerprint differs from the last successful merge (kept in
+        the location's run state) are staged, so the load follows the day's
+        delta rather than the size of the export. Those rows go to a staging
+        table of their own and are merged into <location>_<table_name>: rows
+        whose key exists are updated, new keys are inserted, and history
+        outside the delta's days is never rewritten.
+        The staging table is dropped afterwards, whether the merge worked or
+        not, and expires by itself should the process die first.
+        Returns the MERGE query job, or None when no day changed.
+        """
+        registered_key, registered_partition = INCREMENTAL_TABLES.get(table_name, (None, None))
+        key = [key] if isinstance(key, str) else list(key or registered_key or [])
+        partition_field = partition_field or registered_partition
+        if not key or not partition_field:
+            raise ValueError(f"Incremental load of {table_name} needs a business key and a partition column")
+        missing = [column for column in [*key, partition_field] if column not in df]
+        if missing:
+            raise ValueError(f"Incremental load of {table_name} is missing columns: {', '.join(missing)}")
+
+        start = time.time()
+        self.ensure_dataset(dataset_id)
+        table_id = self.table_id(table_name, dataset_id)
+        # Unique per load so concurrent loads of one table never share staging rows
+        staging_id = f"{table_id}{STAGING_SUFFIX}_{uuid.uuid4().hex[:12]}"
+        fields, created = self.ensure_partitioned_table(
+            table_id, self.schema_for(table_name, df), key, partition_field
+        )
+
+        # A repeated key would make MERGE keep one row and silently drop the rest
+        duplicated = df.duplicated(key, keep=False)
+        if duplicated.any():
+            sample = df.loc[duplicated, key].drop_duplicates().head(5).to_dict("records")
+            raise ValueError(
+                f"Incremental load of {table_name} has {int(duplicated.sum())} rows sharing a key "
+                f"({', '.join(key)}), e.g. {sample}"
+            )
+
+        state_name = self.partition_state_name(table_id)
+        if created:
+            # A fresh table holds none of the days merged before
+            clear_state(self.location, state_name)
+        merged_days = load_state(self.location, state_name, {})
+        dates = _partition_dates(df, partition_field)
+        days = partition_days(dates)
+        digests = partition_digests(df, days)
+        changed = {day for day, digest in digests.items() if merged_days.get(day) != digest}
+        if not changed:
+            log(f"No new or changed days to merge into {table_id}")
+            return None
+        in_changed = days.isin(changed).to_numpy()
+        delta = df[in_changed]
+        log(f"{len(changed)} of {len(digests)} days of {table_name} are new or changed: "
+            f"{len(delta)} of {len(df)} rows")
+
+        staging = bigquery.Table(staging_id, schema=_schema_fields(fields))
+        staging.expires = datetime.datetime.now(datetime.timezone.utc) + STAGING_EXPIRATION
+        self.client.create_table(staging)
+        try:
+            load_job = self.start_load(delta, table_name, bigquery.WriteDisposition.WRITE_APPEND,
+                                       dataset_id=dataset_id, table_id=staging_id, fields=fields)
+            load_job.result()
+
+            delta_dates = dates[in_changed].dropna()
+            partition_range = (min(delta_dates), max(delta_dates)) if len(delta_dates) else None
+            query_job = self.client.query(
+                self.merge_statement(table_id, staging_id, fields, key, partition_field, partition_range)
+            )
+            query_job.result()
+        finally:
+            try:
+                self.client.delete_table(staging_id, not_found_ok=True)
+            except Exception as e:
+                log(f"Warning: Could not drop staging table {staging_id} (it expires by itself): {e}")
+        save_state(self.location, state_name, {**merged_days, **{day: digests[day] for day in changed}})
+        log(
+            f"✅ Merged {len(delta)} rows into {table_id}: "
+            f"{query_job.num_dml_affected_rows} affected, "
+            f"{(query_job.total_bytes_processed or 0) / 1e6:.1f} MB processed "
+            f"in {time.time() - start:.2f}s"
+        )
+        return query_job
+
+    def start_load(self, df, table_name, write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+                   dataset_id=None, table_id=None, fields=None):
+        """Send df to BigQuery and return the running load job."""
+        self.ensure_dataset(dataset_id)
+        table_id = table_id or self.table_id(table_name, dataset_id)
+        fields = fields or self.schema_for(table_name, df)
+        job_config = bigquery.LoadJobConfig(
+            write_disposition=write_disposition,
+            schema=_schema_fields(fields),
+        )
+        log(f"📤 Uploading {df.shape[0]} rows to table: {table_id}")
+        return self.client.load_table_from_dataframe(
+            _prepare_frame(df, fields), table_id, job_config=job_config
+        )
+
+    def upload(self, df, table_name, dataset_id=None, **kwargs):
+        table_id = self.table_id(table_name, dataset_id)
+        job = self.start_load(df, table_name, dataset_id=dataset_id, table_id=table_id, **kwargs)
+        job.result()
+        with self._lock:
+            self._known_tables.add(table_id)
+        log(f"✅ Upload complete: {table_id}")
+        return job
+
+    def upload_many(self, frames, **kwargs):
+        """Load {table_name: df} as concurrent load jobs; returns {table_name: job}.
+
+        All loads are started before any is awaited. Empty frames are skipped.
+        Once all jobs have finished, raises BigQueryUploadError naming every
+        table that failed; the other tables are loaded regardless.
+        """
+        empty = [table_name for table_name, df in frames.items() if df.empty]
+        if empty:
+            log(f"Skipping empty frames: {', '.join(empty)}")
+            frames = {table_name: df for table_name, df in frames.items() if not df.empty}
+        if not frames:
+            return {}
+        self.ensure_dataset(kwargs.get("dataset_id"))
+        jobs, errors = {}, {}
+        merged = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(frames)))) as executor:
+            futures = {}
+            for table_name, df in frames.items():
+                if table_name in INCREMENTAL_TABLES:
+                    # Registered incremental tables are merged instead of truncated
+                    futures[table_name] = submit_in_context(
+                        executor, self.upload_incremental, df, table_name, dataset_id=kwargs.get("dataset_id")
+                    )
+                else:
+                    futures[table_name] = submit_in_context(executor, self.start_load, df, table_name, **kwargs)
+            for table_name, future in futures.items():
+                try:
+                    if table_name in INCREMENTAL_TABLES:
+                        merged[table_name] = future.result()
+                    else:
+                        jobs[table_name] = future.result()
+                except Exception as e:
+                    errors[table_name] = e
+        for table_name, job in jobs.items():
+            table_id = self.table_id(table_name, kwargs.get("dataset_id"))
+            try:
+                job.result()
+            except Exception as e:
+                errors[table_name] = e
+                continue
+            with self._lock:
+                self._known_tables.add(table_id)
+            log(f"✅ Upload complete: {table_id}")
+        loaded = {table_name: job for table_name, job in {**jobs, **merged}.items() if table_name not in errors}
+        if errors:
+            raise BigQueryUploadError(errors, loaded, len(frames))
+        return loaded
+
+
+_uploaders = {}
+_uploaders_lock = threading.Lock()
+
+def get_uploader(location="kolkata", dataset_id=DEFAULT_DATASET):
+    """Shared uploader per (location, dataset) so the client and lookups are reused."""
+    key = (location.lower(), dataset_id)
+    with _uploaders_lock:
+        uploader = _uploaders.get(key)
+        if uploader is None:
+            uploader = _uploaders[key] = BigQueryUploader(location, dataset_id)
+        return uploader
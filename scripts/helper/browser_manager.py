@@ -1,8 +1,110 @@
 from selenium import webdriver
 import os
+import sys
+import time
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
-def create_driver(download_path=None):
+
+# "lean" runs headless with images, fonts, media and trackers blocked
+BROWSER_MODE = os.environ.get("FRONO_BROWSER_MODE", "full")
+CHROME_PROFILE_DIR = os.environ.get(
+    "FRONO_CHROME_PROFILE_DIR", os.path.join(os.getcwd(), ".chrome-profiles")
+)
+# V8 heap cap per renderer, in MB (lean mode only)
+CHROME_JS_HEAP_MB = int(os.environ.get("FRONO_CHROME_JS_HEAP_MB", 512))
+
+LEAN_BLOCKED_URLS = [
+    # images
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # media
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    # third-party analytics and trackers
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*", "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+]
+LEAN_BLOCKED_URLS += [p for p in os.environ.get("FRONO_BLOCKED_URLS", "").split(",") if p]
+
+# Held (flock) by the process whose Chrome uses the slot; the OS drops it if that process dies
+PROFILE_LOCK_FILE = ".frono-slot.lock"
+# Left behind in the profile by a Chrome that crashed or was killed
+CHROME_SINGLETON_FILES = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+def _try_lock(lock):
+    """Lock an open file exclusively without blocking; False if another process holds it."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+def _claim_profile_dir(base_dir, max_slots=32):
+    """Lock a reusable profile slot no other Chrome, in any process, is using.
+
+    Returns (path, lock); the slot stays claimed until lock is closed.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    for slot in range(max_slots):
+        path = os.path.join(base_dir, f"slot-{slot}")
+        os.makedirs(path, exist_ok=True)
+        lock = open(os.path.join(path, PROFILE_LOCK_FILE), "a")
+        if not _try_lock(lock):
+            lock.close()
+            continue
+        # With the slot locked no Chrome of ours runs on it, so these are stale
+        for name in CHROME_SINGLETON_FILES:
+            try:
+                os.remove(os.path.join(path, name))
+            except FileNotFoundError:
+                pass
+        return path, lock
+    raise RuntimeError(f"No free Chrome profile slot in {base_dir}")
+
+def _release_on_quit(driver, lock):
+    """Free the profile slot once the driver has quit."""
+    quit_driver = driver.quit
+
+    def quit():
+        try:
+            quit_driver()
+        finally:
+            lock.close()
+    driver.quit = quit
+
+def _apply_lean_options(options, prefs, profile_dir, js_heap_mb):
+    """Add the lean flags; returns the lock of the claimed profile slot."""
+    profile_path, lock = _claim_profile_dir(profile_dir or CHROME_PROFILE_DIR)
+    options.add_argument("--headless=new")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument(f"--user-data-dir={profile_path}")
+    options.add_argument("--disk-cache-size=33554432")
+    options.add_argument(f"--js-flags=--max-old-space-size={js_heap_mb}")
+    options.add_argument("--renderer-process-limit=2")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-background-networking")
+    options.add_argument("--disable-component-update")
+    options.add_argument("--disable-default-apps")
+    options.add_argument("--disable-sync")
+    options.add_argument("--mute-audio")
+    options.add_argument("--no-first-run")
+    prefs.update({
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    return lock
+
+def create_driver(download_path=None, mode=None, profile_dir=None, js_heap_mb=None):
+    mode = mode or BROWSER_MODE
     options = webdriver.ChromeOptions()
     # options.add_argument("--headless=new")  
     options.add_argument("--window-size=1920,1080")
@@ -16,17 +118,128 @@ def create_driver(download_path=None):
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
 
+    prefs = {}
+    profile_lock = None
+    if mode == "lean":
+        profile_lock = _apply_lean_options(options, prefs, profile_dir, js_heap_mb or CHROME_JS_HEAP_MB)
+
     if download_path:
         os.makedirs(download_path, exist_ok=True)
 
         # Set up download preferences
-        prefs = {
+        prefs.update({
             "download.default_directory": os.path.abspath(download_path),
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True
-        }
+        })
 
+    if prefs:
         options.add_experimental_option("prefs", prefs)
 
-    return webdriver.Chrome(options=options)
+    try:
+        driver = webdriver.Chrome(options=options)
+    except Exception:
+        if profile_lock is not None:
+            profile_lock.close()
+        raise
+
+    if mode == "lean":
+        _release_on_quit(driver, profile_lock)
+        try:
+            # Block heavy and third-party requests at the network layer
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+            if download_path:
+                # Headless Chrome needs downloads allowed explicitly
+                driver.execute_cdp_cmd("Page.setDownloadBehavior", {
+                    "behavior": "allow",
+                    "downloadPath": os.path.abspath(download_path),
+                })
+        except Exception:
+            # Nobody gets this driver back, so quit it and free the profile slot here
+            driver.quit()
+            raise
+
+    return driver
+
+def _child_pids():
+    """Map each running pid to its child pids using /proc (Linux only)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm may contain spaces, so split after its closing paren
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+def process_tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants, in MB, or None if unknown."""
+    if not os.path.isdir("/proc"):
+        return None
+    children = _child_pids()
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+def driver_rss_mb(driver):
+    """Memory used by chromedriver and the Chrome processes it started, in MB."""
+    try:
+        return process_tree_rss_mb(driver.service.process.pid)
+    except AttributeError:
+        return None
+
+
+def measure_page_load(driver, url):
+    """Load url and return navigation timings (ms) plus browser memory (MB)."""
+    start = time.perf_counter()
+    driver.get(url)
+    wall_ms = (time.perf_counter() - start) * 1000
+    timing = driver.execute_script(
+        "const n = performance.getEntriesByType('navigation')[0];"
+        "return n ? {dcl: n.domContentLoadedEventEnd, load: n.loadEventEnd,"
+        " transferred: performance.getEntriesByType('resource')"
+        ".reduce((t, r) => t + (r.transferSize || 0), n.transferSize || 0)} : {};"
+    ) or {}
+    return {
+        "wall_ms": round(wall_ms),
+        "dom_content_loaded_ms": round(timing.get("dcl", 0)),
+        "load_ms": round(timing.get("load", 0)),
+        "transferred_kb": round(timing.get("transferred", 0) / 1024),
+        "rss_mb": driver_rss_mb(driver),
+    }
+
+def compare_profiles(url, runs=3):
+    """Measure page load and memory of the full and lean profiles side by side."""
+    results = {}
+    for mode in ("full", "lean"):
+        driver = create_driver(mode=mode)
+        try:
+            samples = [measure_page_load(driver, url) for _ in range(runs)]
+        finally:
+            driver.quit()
+        results[mode] = {
+            key: round(sum(s[key] or 0 for s in samples) / runs, 1) for key in samples[0]
+        }
+        print(f"{mode:>5}: {results[mode]}", flush=True)
+    return results
+
+
+if __name__ == "__main__":
+    compare_profiles(sys.argv[1] if len(sys.argv) > 1 else "https://fronocloud.com/login")
@@ -1,8 +1,14 @@
+import contextvars
+import hashlib
+import logging
 import os
+import re
+import sys
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
 import pandas as pd
-from google.cloud import bigquery
-
 
 
 # 🌍 Try loading .env if available (for local development)
@@ -18,24 +24,191 @@ if not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
         print("✅ Set GOOGLE_APPLICATION_CREDENTIALS for local run.")
 
         
+# Lines kept in memory per run for the web page / job status
+LOG_BUFFER_LINES = int(os.environ.get("FRONO_LOG_BUFFER_LINES", 5000))
+
+
+class RunLogBuffer:
+    """Bounded, thread-safe list of log lines belonging to one run."""
+
+    def __init__(self, max_lines=LOG_BUFFER_LINES):
+        self._lines = deque(maxlen=max_lines)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def append(self, line):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self.dropped += 1
+            self._lines.append(line)
+
+    def extend(self, lines):
+        for line in lines:
+            self.append(line)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._lines)
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._lines)
+
+
+_current_run_logs = contextvars.ContextVar("frono_run_logs", default=None)
+
+
+class RunLogHandler(logging.Handler):
+    """Send records to the RunLogBuffer of the run active in the current context."""
+
+    def emit(self, record):
+        buffer = _current_run_logs.get()
+        if buffer is not None:
+            try:
+                buffer.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+
+
+logger = logging.getLogger("frono")
+if not logger.handlers:
+    _formatter = logging.Formatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
+    _console = logging.StreamHandler(sys.stdout)
+    _console.setFormatter(_formatter)
+    _run_handler = RunLogHandler()
+    _run_handler.setFormatter(_formatter)
+    logger.addHandler(_console)
+    logger.addHandler(_run_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+@contextmanager
+def capture_run_logs(buffer=None):
+    """Collect every log() call made in this context (thread/task) into a RunLogBuffer."""
+    buffer = buffer if buffer is not None else RunLogBuffer()
+    token = _current_run_logs.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current_run_logs.reset(token)
+
+def submit_in_context(executor, fn, *args, **kwargs):
+    """executor.submit that keeps the caller's log capture in the worker thread.
+
+    Pool threads don't inherit context variables, so a plain submit would drop
+    the worker's log lines from the run log. Use this for every thread pool.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
 def log(msg):
-    print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+    logger.info(msg)
     
+class StageTimer:
+    """Collect wall-clock time spent in each named stage of a run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = []
+
+    @contextmanager
+    def stage(self, label):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((label, time.perf_counter() - start))
+
+    def total(self):
+        return sum(seconds for _, seconds in self.stages)
+
+    def report(self):
+        parts = ", ".join(f"{label} {seconds:.2f}s" for label, seconds in self.stages)
+        log(f"⏱️ {self.name}: {parts} (total {self.total():.2f}s)")
+        return dict(self.stages)
+    
+# Browsers write to a temporary name and rename once the download is complete
+PARTIAL_DOWNLOAD_SUFFIXES = (".crdownload", ".part", ".tmp", ".download")
+
+def download_snapshot(directory):
+    """Record the files in a download directory before triggering a download."""
+    snapshot = {}
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            snapshot[entry.name] = entry.stat().st_mtime_ns
+    return snapshot
+
+def wait_for_new_download(directory, before, extension=".xlsx", timeout=30,
+                          stable_for=0.3, poll_interval=0.1):
+    """Block until a new, fully written file lands in directory and return its path.
+
+    A file counts as new if it is missing from (or modified since) the `before`
+    snapshot. It is returned once no partial download is pending for it and its
+    size has stayed the same for `stable_for` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    sizes = {}
+    while time.monotonic() < deadline:
+        now = time.monotonic()
+        names = os.listdir(directory)
+        partial = {name for name in names if name.endswith(PARTIAL_DOWNLOAD_SUFFIXES)}
+        for name in names:
+            if not name.endswith(extension) or name in partial:
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if before.get(name) == stat.st_mtime_ns:
+                continue
+            if any(p.startswith(name) for p in partial):
+                continue
+            seen = sizes.get(name)
+            if seen is None or seen[0] != stat.st_size:
+                sizes[name] = (stat.st_size, now)
+            elif stat.st_size > 0 and now - seen[1] >= stable_for:
+                log(f"Download complete: {name}")
+                return path
+        time.sleep(poll_interval)
+    raise TimeoutError(f"No new {extension} download in {directory} after {timeout}s")
+
 def wait_for_download(directory, extension=".xlsx", timeout=30):
     log("Waiting for download to complete...")
-    end_time = time.time() + timeout
-    while time.time() < end_time:
-        files = [f for f in os.listdir(directory) if f.endswith(extension) and not f.endswith(".crdownload")]
-        if files:
-            return os.path.join(directory, files[0])
-        time.sleep(1)
-    raise Exception("Download timeout")
+    return wait_for_new_download(directory, {}, extension=extension, timeout=timeout)
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 def ensure_download_path(location, folder_name):
     path = os.path.join(os.getcwd(), location, folder_name)
     os.makedirs(path, exist_ok=True)
     return path
 
+def configured_locations():
+    """Locations with FRONO_<LOCATION>_USERNAME/PASSWORD set, or FRONO_LOCATIONS if given."""
+    if os.environ.get("FRONO_LOCATIONS"):
+        return [l.strip().lower() for l in os.environ["FRONO_LOCATIONS"].split(",") if l.strip()]
+    locations = []
+    for key in os.environ:
+        match = re.fullmatch(r"FRONO_([A-Z0-9]+)_USERNAME", key)
+        if match and os.environ.get(f"FRONO_{match.group(1)}_PASSWORD"):
+            locations.append(match.group(1).lower())
+    return sorted(locations)
+
+def unknown_locations(locations, allowed=None):
+    """Requested locations that aren't configured (or in allowed); they must never reach a path."""
+    allowed = set(configured_locations() if allowed is None else allowed)
+    return [location for location in locations
+            if location not in allowed or not re.fullmatch(r"[a-z0-9_-]+", location)]
+
 def load_credentials(location="kolkata"):
     username = os.environ.get(f"FRONO_{location.upper()}_USERNAME")
     password = os.environ.get(f"FRONO_{location.upper()}_PASSWORD")
@@ -44,46 +217,32 @@ def load_credentials(location="kolkata"):
     return username, password
 
 
-def load_dataframe(file_path):
-    print(f"📂 Loading file: {file_path}")
+def load_dataframe(file_path, columns=None, header_row=0):
+    """Load a CSV or xlsx report, optionally only the named columns."""
+    log(f"📂 Loading file: {file_path}")
 
     if file_path.endswith(".csv"):
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, usecols=columns, header=header_row)
     elif file_path.endswith(".xlsx"):
-        df = pd.read_excel(file_path, engine="openpyxl")
+        from scripts.helper.frame_cache import frame_cache
+
+        df = frame_cache.read_excel(file_path, columns=columns, header_row=header_row, skip_blank=False)
     else:
         raise ValueError("Unsupported file type. Only .csv and .xlsx are supported.")
 
     return df
 
-def upload_to_bigquery(df, table_name, dataset_id="frono_2025", location="kolkata"):
-    log(f"Creating BigQuery client...")
-    client = bigquery.Client()
-    project_id = client.project
-
-    # ✅ Add prefix to table name
-    prefixed_table_name = f"{location.lower()}_{table_name}"
-    table_id = f"{project_id}.{dataset_id}.{prefixed_table_name}"
+def upload_to_bigquery(df, table_name, dataset_id="frono_2025", location="kolkata",
+                       key=None, partition_field=None):
+    """Load df into <location>_<table_name>.
 
+    Replaces the table's contents, unless a business key and partition column
+    are given (or registered for the table), in which case df is merged in
+    incrementally.
+    """
+    from scripts.helper.bigquery_uploader import INCREMENTAL_TABLES, get_uploader
 
-    dataset_ref = bigquery.Dataset(f"{project_id}.{dataset_id}")
-    try:
-        client.get_dataset(dataset_ref)
-        log(f"📦 Dataset exists: {dataset_id}")
-    except Exception:
-        log(f"📦 Dataset not found: {dataset_id}. Creating...")
-        dataset = bigquery.Dataset(dataset_ref)
-        dataset.location = "asia-south1"
-        client.create_dataset(dataset)
-        log(f"✅ Created dataset: {dataset_id}")
-
-    write_mode = bigquery.WriteDisposition.WRITE_TRUNCATE
-    job_config = bigquery.LoadJobConfig(
-        write_disposition=write_mode,
-        autodetect=True
-    )
-
-    log(f"📤 Uploading {df.shape[0]} rows to table: {table_id}")
-    job = client.load_table_from_dataframe(df, table_id, job_config=job_config)
-    job.result()
-    log(f"✅ Upload complete: {table_id}")
+    uploader = get_uploader(location, dataset_id)
+    if key or table_name in INCREMENTAL_TABLES:
+        return uploader.upload_incremental(df, table_name, key=key, partition_field=partition_field)
+    return uploader.upload(df, table_name)
@@ -0,0 +1,185 @@
+import fnmatch
+import json
+import os
+import shutil
+import threading
+import time
+
+from scripts.helper.common_utils import PARTIAL_DOWNLOAD_SUFFIXES, file_sha256, log
+
+
+STORE_DIR = "store"
+INDEX_FILE = "index.json"
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _dir_lock(root):
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(root), threading.Lock())
+
+
+class DownloadStore:
+    """Content-addressed home for the files downloaded into one directory.
+
+    Each finished download is moved to <root>/store/<sha256><ext>; a second
+    download with the same content is deleted instead of kept as "name (1)".
+    Files that were already in the directory (older downloads, exports
+    dropped there by other tools, sample files checked into git) are copied
+    in by sweep() and left where they are.
+    <root>/store/index.json records per file the location, kind of download,
+    original name, when it was first and last fetched, and which consumers
+    have already processed it.
+    """
+
+    def __init__(self, root, location=None):
+        self.root = os.path.abspath(root)
+        self.location = location or os.path.basename(os.path.dirname(self.root))
+        self.store_dir = os.path.join(self.root, STORE_DIR)
+        self.index_path = os.path.join(self.store_dir, INDEX_FILE)
+        self._lock = _dir_lock(self.root)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            log(f"Warning: Rebuilding unreadable download index {self.index_path}: {e}")
+            return {}
+
+    def _save_index(self, index):
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.index_path)
+
+    def path(self, record):
+        return os.path.join(self.store_dir, record["file"])
+
+    @staticmethod
+    def _source_signature(file_path):
+        stat = os.stat(file_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def ingest(self, file_path, kind, keep_source=False):
+        """File a finished download in the store; returns (record, is_new).
+
+        The file is moved (or deleted if its content is already stored) unless
+        keep_source is set, in which case it is copied and left in place.
+        """
+        digest = file_sha256(file_path)
+        # A download's mtime is when it finished, also for files swept up later
+        fetched_at = os.path.getmtime(file_path)
+        signature = self._source_signature(file_path)
+        with self._lock:
+            index = self._load_index()
+            record = index.get(digest)
+            if record is not None and os.path.exists(self.path(record)):
+                # Same content as a file we already hold: drop the copy, keep one object
+                if not keep_source:
+                    os.remove(file_path)
+                if fetched_at > record["last_fetched_at"]:
+                    os.utime(self.path(record), (fetched_at, fetched_at))
+                    record["last_fetched_at"] = fetched_at
+                record["fetch_count"] = record.get("fetch_count", 1) + 1
+                is_new = False
+                log(f"Duplicate download of {record['original_name']} ({digest[:12]}) discarded")
+            else:
+                os.makedirs(self.store_dir, exist_ok=True)
+                stored_name = digest + os.path.splitext(file_path)[1].lower()
+                if keep_source:
+                    shutil.copy2(file_path, os.path.join(self.store_dir, stored_name))
+                else:
+                    os.replace(file_path, os.path.join(self.store_dir, stored_name))
+                record = {
+                    "sha256": digest,
+                    "file": stored_name,
+                    "kind": kind,
+                    "location": self.location,
+                    "original_name": os.path.basename(file_path),
+                    "size": os.path.getsize(os.path.join(self.store_dir, stored_name)),
+                    "fetched_at": fetched_at,
+                    "last_fetched_at": fetched_at,
+                    "fetch_count": 1,
+                    "processed": {},
+                }
+                is_new = True
+            record.pop("pruned_at", None)
+            if keep_source:
+                # Lets sweep() pass over this file until it changes
+                record.setdefault("sources", {})[os.path.basename(file_path)] = signature
+            index[digest] = record
+            self._save_index(index)
+        return dict(record), is_new
+
+    def sweep(self, kind, pattern="*.xlsx"):
+        """Copy new or changed files in root matching pattern into the store, oldest first.
+
+        The files themselves stay put, so tracked sample exports are never
+        moved; a file already copied in is skipped until it changes.
+        """
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            known = {
+                (name, tuple(signature))
+                for record in self._load_index().values()
+                for name, signature in record.get("sources", {}).items()
+            }
+        paths = [
+            os.path.join(self.root, name) for name in names
+            if fnmatch.fnmatch(name, pattern)
+            and not name.startswith("~$")
+            and not name.endswith(PARTIAL_DOWNLOAD_SUFFIXES)
+            and os.path.isfile(os.path.join(self.root, name))
+            and (name, tuple(self._source_signature(os.path.join(self.root, name)))) not in known
+        ]
+        return [self.ingest(path, kind, keep_source=True)[0] for path in sorted(paths, key=os.path.getmtime)]
+
+    def latest(self, kind):
+        """The most recently fetched file of a kind, or None."""
+        with self._lock:
+            records = [
+                record for record in self._load_index().values()
+                if record["kind"] == kind and "pruned_at" not in record and os.path.exists(self.path(record))
+            ]
+        return max(records, key=lambda record: record["last_fetched_at"]) if records else None
+
+    def is_processed(self, digest, consumer):
+        with self._lock:
+            record = self._load_index().get(digest)
+        return bool(record and consumer in record.get("processed", {}))
+
+    def mark_processed(self, digest, consumer):
+        with self._lock:
+            index = self._load_index()
+            if digest in index:
+                index[digest].setdefault("processed", {})[consumer] = time.time()
+                self._save_index(index)
+
+    def prune(self, kind, keep=3):
+        """Delete all but the `keep` most recently fetched files of a kind.
+
+        The index keeps a pruned_at marker for them, so a source file still
+        lying in root isn't copied in again by the next sweep.
+        """
+        with self._lock:
+            index = self._load_index()
+            records = sorted(
+                (record for record in index.values() if record["kind"] == kind and "pruned_at" not in record),
+                key=lambda record: record["last_fetched_at"], reverse=True
+            )
+            for record in records[keep:]:
+                try:
+                    os.remove(self.path(record))
+                except FileNotFoundError:
+                    pass
+                index[record["sha256"]]["pruned_at"] = time.time()
+            if records[keep:]:
+                self._save_index(index)
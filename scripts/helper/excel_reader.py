@@ -0,0 +1,117 @@
+import os
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+
+EXCEL_CHUNK_ROWS = int(os.getenv("FRONO_EXCEL_CHUNK_ROWS", "5000"))
+
+
+def _header_names(cells):
+    """Column names the way pd.read_excel makes them: 'Unnamed: i' for blanks, '.1' for repeats."""
+    names, seen = [], {}
+    for position, cell in enumerate(cells):
+        name = f"Unnamed: {position}" if cell is None or str(cell).strip() == "" else cell
+        if isinstance(name, float) and name.is_integer():
+            name = int(name)
+        count = seen.get(name, 0)
+        seen[name] = count + 1
+        names.append(f"{name}.{count}" if count else name)
+    return names
+
+def _projection(names, columns):
+    """Positions of the requested columns; every name must be in the header."""
+    if columns is None:
+        return list(range(len(names)))
+    positions = {name: position for position, name in enumerate(names)}
+    missing = [column for column in columns if column not in positions]
+    if missing:
+        raise ValueError(f"Columns not found in sheet header: {', '.join(map(str, missing))}")
+    return [positions[column] for column in columns]
+
+def iter_excel_chunks(path, columns=None, chunk_rows=None, sheet_name=None, header_row=0,
+                      skip_blank=True):
+    """Stream a worksheet as DataFrames of at most chunk_rows rows.
+
+    The workbook is opened read-only and rows are parsed lazily, so memory is
+    bounded by one chunk of the requested columns rather than the whole sheet.
+    header_row is the 0-based row holding the column names. Blank rows are
+    skipped unless skip_blank is False, in which case only trailing blank rows
+    are dropped (as pd.read_excel does), keeping row positions intact. Raises
+    ValueError if a requested column isn't in the header.
+    """
+    chunk_rows = max(1, chunk_rows or EXCEL_CHUNK_ROWS)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name is not None else wb.worksheets[0]
+        # Exported workbooks often carry a wrong <dimension>; read until the data ends
+        ws.reset_dimensions()
+        header = next(ws.iter_rows(min_row=header_row + 1, max_row=header_row + 1, values_only=True), None)
+        if not header:
+            return
+        header = list(header)
+        while header and header[-1] is None:
+            header.pop()
+        names = _header_names(header)
+        positions = _projection(names, columns)
+        if not positions:
+            return
+        selected = [names[position] for position in positions]
+        width = max(positions) + 1
+        pick = itemgetter(*positions) if len(positions) > 1 else (lambda row: (row[positions[0]],))
+        blank = (None,) * len(positions)
+
+        batch = []
+        pending_blanks = 0
+        for row in ws.iter_rows(min_row=header_row + 2, max_col=width, values_only=True):
+            if len(row) < width:
+                row = tuple(row) + (None,) * (width - len(row))
+            values = pick(row)
+            if all(value is None for value in values):
+                pending_blanks += not skip_blank
+                continue
+            if pending_blanks:
+                batch.extend([blank] * pending_blanks)
+                pending_blanks = 0
+            batch.append(values)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame.from_records(batch, columns=selected)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=selected)
+    finally:
+        wb.close()
+
+def _concat_chunks(chunks):
+    """pd.concat with each chunk's all-blank columns cast to the column's type in the other chunks.
+
+    pandas is deprecating how concat ignores all-NA columns when picking the
+    result dtype, so give them that dtype explicitly.
+    """
+    for column in chunks[0].columns:
+        blank = [chunk[column].isna().all() for chunk in chunks]
+        if not any(blank) or all(blank):
+            continue
+        try:
+            dtype = np.result_type(*(chunk[column].dtype for chunk, is_blank in zip(chunks, blank) if not is_blank))
+        except TypeError:  # e.g. extension dtypes
+            dtype = np.dtype(object)
+        # The blank rows hold NaN, so integers widen to float as they would have
+        if dtype.kind in "iu":
+            dtype = np.dtype(float)
+        elif dtype.kind == "b":
+            dtype = np.dtype(object)
+        for chunk, is_blank in zip(chunks, blank):
+            if is_blank:
+                chunk[column] = chunk[column].astype(dtype)
+    return pd.concat(chunks, ignore_index=True)
+
+def read_excel_columns(path, columns=None, chunk_rows=None, sheet_name=None, header_row=0,
+                       skip_blank=True):
+    """Read a worksheet (or just some of its columns) through iter_excel_chunks."""
+    chunks = list(iter_excel_chunks(path, columns, chunk_rows, sheet_name, header_row, skip_blank))
+    if not chunks:
+        return pd.DataFrame(columns=list(columns) if columns is not None else [])
+    return _concat_chunks(chunks) if len(chunks) > 1 else chunks[0]
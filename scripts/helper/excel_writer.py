@@ -0,0 +1,215 @@
+import os
+import posixpath
+import re
+import zipfile
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from scripts.helper.common_utils import log
+
+
+# "patch" edits only changed cells of the template, "stream" writes a fresh
+# workbook row by row in write-only mode, "frame" uses DataFrame.to_excel
+IMPORT_WRITER_MODE = os.environ.get("IMPORT_WRITER_MODE", "patch")
+# Outputs with more rows than this are streamed instead of built in memory
+STREAM_WRITE_THRESHOLD = int(os.environ.get("STREAM_WRITE_THRESHOLD", 200000))
+
+
+def _cell_value(value):
+    """Convert a DataFrame value into something openpyxl writes as-is."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+class TemplateLayoutError(ValueError):
+    """The template isn't laid out the way the cell patcher expects."""
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_START_RE = re.compile(rb'<row r="(\d+)"')
+HEADER_CELL_RE = re.compile(
+    rb'<c r="([A-Z]+)1"([^>]*?)(?:/>|>(.*?)</c>)', re.S
+)
+
+def _first_sheet_part(archive):
+    """Return the zip member name of the workbook's first worksheet."""
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find(f"{{{MAIN_NS}}}sheets/{{{MAIN_NS}}}sheet")
+    rel_id = sheet.get(f"{{{REL_NS}}}id")
+    rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.findall(f"{{{PKG_REL_NS}}}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise TemplateLayoutError("Could not locate the first worksheet")
+
+def _header_columns(archive, sheet_xml):
+    """Map header text in row 1 to column letters."""
+    header_end = sheet_xml.find(b"</row>")
+    shared_strings = None
+    columns = {}
+    for match in HEADER_CELL_RE.finditer(sheet_xml, 0, header_end):
+        letter, attrs, body = match.group(1).decode(), match.group(2), match.group(3) or b""
+        if b't="s"' in attrs:
+            if shared_strings is None:
+                root = ElementTree.fromstring(archive.read("xl/sharedStrings.xml"))
+                shared_strings = [
+                    "".join(t.text or "" for t in si.iter(f"{{{MAIN_NS}}}t"))
+                    for si in root.findall(f"{{{MAIN_NS}}}si")
+                ]
+            value = shared_strings[int(re.search(rb"<v>(\d+)</v>", body).group(1))]
+        else:
+            element = ElementTree.fromstring(b'<c xmlns="%s">%s</c>' % (MAIN_NS.encode(), body))
+            value = "".join(t.text or "" for t in element.iter(f"{{{MAIN_NS}}}t"))
+            if not value:
+                v = element.find(f"{{{MAIN_NS}}}v")
+                value = v.text if v is not None else ""
+        columns[value] = letter
+    return columns
+
+def _cell_xml(ref, value, style):
+    """Serialise one cell, using inline strings so sharedStrings stays untouched."""
+    style_attr = f' s="{style}"' if style else ''
+    value = _cell_value(value)
+    if value is None:
+        return f'<c r="{ref}"{style_attr} />'.encode()
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{style_attr} t="b"><v>{int(value)}</v></c>'.encode()
+    if isinstance(value, (int, float)):
+        return f'<c r="{ref}"{style_attr} t="n"><v>{value!r}</v></c>'.encode()
+    text = escape(str(value))
+    return f'<c r="{ref}"{style_attr} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'.encode()
+
+def patch_sheet_xml(template_path, output_path, df, columns, rows):
+    """Copy the template, rewriting only the XML of the changed cells.
+
+    The worksheet XML is spliced as bytes: untouched rows are copied verbatim,
+    and only the `columns` cells of the given positional `rows` are
+    re-serialised, so the Python work grows with the number of changed rows.
+    Raises TemplateLayoutError when the sheet doesn't carry explicit cell
+    references for those cells.
+    """
+    with zipfile.ZipFile(template_path) as archive:
+        sheet_part = _first_sheet_part(archive)
+        sheet_xml = archive.read(sheet_part)
+
+        header = _header_columns(archive, sheet_xml)
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise TemplateLayoutError(f"Template header is missing columns: {', '.join(missing)}")
+
+        row_starts = {int(m.group(1)): m.start() for m in ROW_START_RE.finditer(sheet_xml)}
+        values = {column: df[column].to_numpy(dtype=object) for column in columns}
+
+        pieces = []
+        position = 0
+        for row in sorted(int(r) for r in rows):
+            sheet_row = row + 2
+            start = row_starts.get(sheet_row)
+            if start is None:
+                raise TemplateLayoutError(f"Row {sheet_row} not found in template")
+            end = sheet_xml.index(b"</row>", start)
+            segment = sheet_xml[start:end]
+            for column in columns:
+                ref = f"{header[column]}{sheet_row}"
+                cell = re.search(rb'<c r="%s"([^>]*?)(?:/>|>.*?</c>)' % ref.encode(), segment, re.S)
+                if cell is None:
+                    raise TemplateLayoutError(f"Cell {ref} not found in template")
+                style = re.search(rb'\ss="(\d+)"', cell.group(1))
+                new_cell = _cell_xml(ref, values[column][row], style.group(1).decode() if style else None)
+                segment = segment[:cell.start()] + new_cell + segment[cell.end():]
+            pieces.append(sheet_xml[position:start])
+            pieces.append(segment)
+            position = end
+        pieces.append(sheet_xml[position:])
+
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as output:
+            for info in archive.infolist():
+                data = b"".join(pieces) if info.filename == sheet_part else archive.read(info.filename)
+                output.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED)
+
+def patch_workbook(template_path, output_path, df, columns, rows):
+    """openpyxl fallback for patch_sheet_xml: load the template once, set the changed cells, save."""
+    wb = load_workbook(template_path)
+    ws = wb.active
+    header = {cell.value: cell.column for cell in ws[1]}
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise TemplateLayoutError(f"Template header is missing columns: {', '.join(missing)}")
+
+    for column in columns:
+        col_idx = header[column]
+        values = df[column].to_numpy(dtype=object)
+        for row in rows:
+            # ws.cell(value=None) leaves the cell alone, so assign explicitly
+            ws.cell(row=int(row) + 2, column=col_idx).value = _cell_value(values[row])
+
+    wb.save(output_path)
+
+def stream_workbook(df, output_path, sheet_title="Sheet1"):
+    """Write df to a new workbook in openpyxl write-only mode, one row at a time."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    ws.append([str(column) for column in df.columns])
+    for row in df.itertuples(index=False, name=None):
+        ws.append([_cell_value(value) for value in row])
+    wb.save(output_path)
+
+def write_import_workbook(df, output_path, template_path=None, changed_rows=None,
+                          columns=('Stock Qty', 'Cost price'), mode=None):
+    """Save the import workbook using the configured writer mode.
+
+    Patch mode needs the template the DataFrame was read from and the positions
+    of the rows whose `columns` changed; without them, or for outputs above
+    STREAM_WRITE_THRESHOLD rows, the workbook is streamed instead.
+    """
+    mode = mode or IMPORT_WRITER_MODE
+    if mode == "patch" and (template_path is None or changed_rows is None):
+        mode = "stream"
+    if mode == "frame" and len(df) > STREAM_WRITE_THRESHOLD:
+        mode = "stream"
+
+    if mode == "patch":
+        try:
+            patch_sheet_xml(template_path, output_path, df, list(columns), changed_rows)
+            log(f"Patched {len(changed_rows)} rows of {os.path.basename(template_path)} into {output_path}")
+            return mode
+        except (TemplateLayoutError, zipfile.BadZipFile, KeyError) as e:
+            log(f"⚠️ Could not patch template XML ({e}), patching through openpyxl")
+        try:
+            patch_workbook(template_path, output_path, df, list(columns), changed_rows)
+            log(f"Patched {len(changed_rows)} rows of {os.path.basename(template_path)} into {output_path}")
+            return mode
+        except TemplateLayoutError as e:
+            log(f"⚠️ Could not patch template, streaming full workbook instead: {e}")
+            mode = "stream"
+
+    if mode == "stream":
+        stream_workbook(df, output_path)
+    else:
+        df.to_excel(output_path, index=False)
+    log(f"Wrote {len(df)} rows to {output_path} ({mode} mode)")
+    return mode
+
+def changed_row_positions(before, after, columns=('Stock Qty', 'Cost price')):
+    """Positions of rows where any of `columns` differs between two aligned frames."""
+    changed = np.zeros(len(after), dtype=bool)
+    for column in columns:
+        old = before[column].to_numpy(dtype=object)
+        new = after[column].to_numpy(dtype=object)
+        old_blank = pd.isna(old) | (old == '')
+        new_blank = pd.isna(new) | (new == '')
+        changed |= (old_blank != new_blank) | (~old_blank & ~new_blank & (old != new))
+    return np.flatnonzero(changed)
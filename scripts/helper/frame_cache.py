@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import threading
+
+from scripts.helper.common_utils import file_sha256, log
+from scripts.helper.excel_reader import read_excel_columns
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # Optional: without pyarrow every load parses the workbook
+    pa = None
+    feather = None
+
+
+FRAME_CACHE_DIR = os.getenv("FRONO_FRAME_CACHE_DIR", os.path.join(os.getcwd(), ".frame-cache"))
+FRAME_CACHE_MAX_MB = int(os.getenv("FRONO_FRAME_CACHE_MAX_MB", "512"))
+# Bump when the reader's output changes so old entries are never served
+READER_VERSION = 1
+
+
+class FrameCache:
+    """Parsed workbooks stored as uncompressed Arrow (Feather v2) files on disk.
+
+    Entries are keyed by the workbook's content hash plus the read options
+    (sheet, columns, header row), so a re-downloaded but identical report is
+    a hit. Hits are memory-mapped reads. Least recently used entries are
+    evicted once the directory grows past max_mb.
+    """
+
+    def __init__(self, directory=FRAME_CACHE_DIR, max_mb=FRAME_CACHE_MAX_MB):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._hashes = {}
+        self._uncacheable = set()
+        self._warned_disabled = False
+
+    @property
+    def enabled(self):
+        if feather is None and self.max_bytes > 0 and not self._warned_disabled:
+            self._warned_disabled = True
+            log("Warning: pyarrow is not installed, parsed workbooks are not cached")
+        return feather is not None and self.max_bytes > 0
+
+    def content_hash(self, file_path):
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_sha256(file_path)
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def entry_path(self, file_path, **options):
+        options = json.dumps({"v": READER_VERSION, **options}, sort_keys=True, default=str)
+        suffix = hashlib.sha256(options.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.directory, f"{self.content_hash(file_path)[:32]}-{suffix}.arrow")
+
+    def get(self, entry):
+        try:
+            table = feather.read_table(entry, memory_map=True)
+        except FileNotFoundError:
+            return None
+        except (pa.ArrowException, OSError) as e:
+            log(f"Warning: Dropping unreadable cache entry {entry}: {e}")
+            self._remove(entry)
+            return None
+        # Touch it so eviction sees it as recently used
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return table.to_pandas()
+
+    def put(self, entry, df):
+        """Store df; frames Arrow can't represent (e.g. mixed-type columns) are skipped."""
+        if entry in self._uncacheable or not all(isinstance(column, str) for column in df.columns):
+            return  # Arrow would turn non-string names into strings
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, entry)
+        except (pa.ArrowException, TypeError, ValueError, OSError) as e:
+            log(f"Warning: Not caching parsed workbook: {e}")
+            self._remove(tmp_path)
+            with self._lock:
+                self._uncacheable.add(entry)
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".arrow")]
+            except FileNotFoundError:
+                return
+            stats = []
+            for entry in entries:
+                try:
+                    stats.append((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path))
+                except FileNotFoundError:
+                    continue
+            total = sum(size for _, size, _ in stats)
+            for _, size, path in sorted(stats):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def read_excel(self, file_path, columns=None, sheet_name=None, header_row=0, skip_blank=True):
+        """read_excel_columns, served from the cache when this workbook was parsed before."""
+        if not self.enabled:
+            return read_excel_columns(file_path, columns, sheet_name=sheet_name,
+                                      header_row=header_row, skip_blank=skip_blank)
+        entry = self.entry_path(file_path, columns=columns, sheet_name=sheet_name,
+                                header_row=header_row, skip_blank=skip_blank)
+        df = self.get(entry)
+        if df is not None:
+            return df
+        df = read_excel_columns(file_path, columns, sheet_name=sheet_name,
+                                header_row=header_row, skip_blank=skip_blank)
+        self.put(entry, df)
+        return df
+
+
+frame_cache = FrameCache()
@@ -0,0 +1,168 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+from urllib3.util.retry import Retry
+
+from scripts.helper.common_utils import log
+
+
+FRONO_BASE_URL = os.environ.get("FRONO_BASE_URL", "https://fronocloud.com")
+# API paths behind the login form and the "Import Item Stock" upload
+FRONO_LOGIN_PATH = os.environ.get("FRONO_LOGIN_PATH", "")
+FRONO_IMPORT_PATH = os.environ.get("FRONO_IMPORT_PATH", "")
+FRONO_IMPORT_FIELD = os.environ.get("FRONO_IMPORT_FIELD", "file")
+FRONO_STOCK_TYPE_FIELD = os.environ.get("FRONO_STOCK_TYPE_FIELD", "stockType")
+# localStorage key the web app keeps its bearer token under
+FRONO_AUTH_STORAGE_KEY = os.environ.get("FRONO_AUTH_STORAGE_KEY", "token")
+# "http" uploads through the API and only falls back to Selenium on failure
+FRONO_IMPORT_MODE = os.environ.get("FRONO_IMPORT_MODE", "browser")
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class FronoImportError(Exception):
+    """FronoCloud rejected a login or an import over HTTP.
+
+    `status` is the HTTP status of the response, or None when no request was
+    made (e.g. the API path is not configured).
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+    @property
+    def rejected(self):
+        """True when FronoCloud explicitly refused the request, so nothing was applied."""
+        return self.status is None or self.status < 500
+
+
+def request_not_sent(error):
+    """True for request failures that happen before the body reaches the server."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        reason = error.args[0]
+        # Failed connects come wrapped in MaxRetryError; anything else may be mid-request
+        return isinstance(reason, MaxRetryError) and isinstance(reason.reason, NewConnectionError)
+    return False
+
+
+def _find_token(payload):
+    """Pull an auth token out of a login response, wherever the API nests it."""
+    if isinstance(payload, dict):
+        for key in ("token", "accessToken", "access_token", "authToken"):
+            if isinstance(payload.get(key), str):
+                return payload[key]
+        for value in payload.values():
+            token = _find_token(value)
+            if token:
+                return token
+    return None
+
+
+class FronoHttpClient:
+    """Keep-alive HTTP session for FronoCloud's import API.
+
+    Authenticate either by copying the cookies and token of a logged-in
+    Selenium driver (from_driver) or by posting credentials (login). Use it
+    as a context manager, or call close(), to release its connections.
+    """
+
+    def __init__(self, base_url=FRONO_BASE_URL, session=None, timeout=120, pool_size=4,
+                 login_path=FRONO_LOGIN_PATH, import_path=FRONO_IMPORT_PATH):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.login_path = login_path
+        self.import_path = import_path
+        self.session = session or requests.Session()
+        # Only retry failed connects: replaying an import POST could apply stock twice
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.5)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @classmethod
+    def from_driver(cls, driver, base_url=FRONO_BASE_URL, **kwargs):
+        client = cls(base_url, **kwargs)
+        for cookie in driver.get_cookies():
+            client.session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain"), path=cookie.get("path", "/")
+            )
+        token = driver.execute_script(
+            "return window.localStorage.getItem(arguments[0]) || window.sessionStorage.getItem(arguments[0]);",
+            FRONO_AUTH_STORAGE_KEY
+        )
+        if token:
+            client.set_token(token.strip('"'))
+        user_agent = driver.execute_script("return navigator.userAgent;")
+        if user_agent:
+            client.session.headers["User-Agent"] = user_agent
+        return client
+
+    def set_token(self, token):
+        self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def _url(self, path):
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def _json(self, response, action):
+        if response.status_code >= 400:
+            raise FronoImportError(
+                f"{action} failed with HTTP {response.status_code}: {response.text[:200]}", response.status_code
+            )
+        try:
+            payload = response.json()
+        except ValueError:
+            return {}
+        if isinstance(payload, dict) and (payload.get("success") is False or payload.get("status") is False):
+            raise FronoImportError(f"{action} rejected: {payload.get('message') or payload}", response.status_code)
+        return payload
+
+    def login(self, username, password, path=None):
+        path = path or self.login_path
+        if not path:
+            raise FronoImportError("FRONO_LOGIN_PATH is not configured")
+        response = self.session.post(
+            self._url(path), json={"userName": username, "password": password}, timeout=self.timeout
+        )
+        payload = self._json(response, "Login")
+        token = _find_token(payload)
+        if token:
+            self.set_token(token)
+        log("✅ Logged in to FronoCloud over HTTP")
+        return payload
+
+    def import_stock(self, file_path, stock_type, path=None):
+        """Upload an import workbook for "Stock In" or "Stock Out" and return the API response."""
+        path = path or self.import_path
+        if not path:
+            raise FronoImportError("FRONO_IMPORT_PATH is not configured")
+        with open(file_path, "rb") as f:
+            response = self.session.post(
+                self._url(path),
+                files={FRONO_IMPORT_FIELD: (os.path.basename(file_path), f, XLSX_MIME)},
+                data={FRONO_STOCK_TYPE_FIELD: stock_type},
+                timeout=self.timeout
+            )
+        payload = self._json(response, f"{stock_type} import")
+        log(f"✅ Imported {os.path.basename(file_path)} over HTTP ({response.elapsed.total_seconds():.2f}s)")
+        return payload
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def http_import_enabled():
+    return FRONO_IMPORT_MODE == "http" and bool(FRONO_IMPORT_PATH)
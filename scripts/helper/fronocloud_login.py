@@ -3,7 +3,24 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from scripts.helper.page_waits import wait_for, wait_for_page_ready
+
+LOGIN_URL = "https://fronocloud.com/login"
+
 def login(driver, username, password):
-    driver.get("https://fronocloud.com/login")
+    driver.get(LOGIN_URL)
     WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "userName"))).send_keys(username)
     WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "password"))).send_keys(password + Keys.RETURN)
+
+def is_logged_out(driver):
+    """True when the session has expired and FronoCloud bounced us to the login page."""
+    return "/login" in driver.current_url
+
+def open_stock_in_out(driver, username, password):
+    """Log in and land on the stock in/out page. Returns the page URL."""
+    login(driver, username, password)
+    wait_for(driver, "login", EC.url_contains("/dashboard"))
+    stock_url = driver.current_url.replace("/dashboard", "/stockinout")
+    driver.get(stock_url)
+    wait_for_page_ready(driver, "stock in/out page")
+    return stock_url
@@ -0,0 +1,111 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.helper.common_utils import RunLogBuffer, capture_run_logs, log, submit_in_context
+
+
+# Background runs executing at once, and finished jobs kept for /jobs/<id>
+JOB_WORKERS = int(os.environ.get("FRONO_JOB_WORKERS", 2))
+JOB_HISTORY = int(os.environ.get("FRONO_JOB_HISTORY", 200))
+
+
+class Job:
+    def __init__(self, kind, params, key=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.logs = RunLogBuffer()
+
+    def to_dict(self):
+        def elapsed(start, end):
+            if start is None:
+                return None
+            return round((end or time.time()) - start, 2)
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": {
+                "queued_seconds": elapsed(self.created_at, self.started_at),
+                "run_seconds": elapsed(self.started_at, self.finished_at),
+            },
+            "result": self.result,
+            "error": self.error,
+            "logs": self.logs.snapshot(),
+        }
+
+
+class JobQueue:
+    """Run jobs on a small background thread pool and keep their status around.
+
+    Submitting a job whose `key` matches one that is still queued returns the
+    queued job instead of adding another, so bursts of identical triggers
+    collapse into a single run.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, history=JOB_HISTORY):
+        self.history = history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="frono-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, params=None, key=None):
+        """Queue func(job, **params) and return the Job straight away."""
+        params = params or {}
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and job.status == "queued":
+                        return job
+            job = Job(kind, params, key)
+            self._jobs[job.id] = job
+            self._trim()
+        submit_in_context(self._executor, self._run, job, func)
+        log(f"Queued {kind} job {job.id}")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self, limit=20):
+        with self._lock:
+            jobs = list(self._jobs.values())[-limit:]
+        return list(reversed(jobs))
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[job_id]
+
+    def _run(self, job, func):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            # Everything the job logs on this thread lands in job.logs as it happens
+            with capture_run_logs(job.logs):
+                job.result = func(job, **job.params)
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            job.logs.append(f"❌ Error: {e}")
+        finally:
+            job.finished_at = time.time()
+            log(f"{job.kind} job {job.id} {job.status} in {job.finished_at - job.started_at:.2f}s")
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from scripts.helper.common_utils import log
+
+
+# Generic FronoCloud/PrimeNG/Bootstrap markers for "still busy" and feedback UI
+SPINNER_XPATH = (
+    "//*[contains(@class, 'spinner') or contains(@class, 'loader') "
+    "or contains(@class, 'p-progress-spinner') or self::ngx-spinner]"
+)
+TOAST_XPATH = "//div[@role='alert']"
+
+DEFAULT_WAIT_TIMEOUT = 10
+POLL_INTERVAL = 0.1
+LATENCY_FILE = os.environ.get("WAIT_LATENCY_FILE", os.path.join("logs", "wait_latencies.json"))
+
+
+class LatencyTracker:
+    """Remember how long each wait step took and derive timeouts from it.
+
+    Once a step has `min_samples` observations its timeout becomes
+    `factor` x the 95th percentile latency when that exceeds the default,
+    capped at max_timeout. Waits are condition-based, so a timeout is only
+    ever extended: a shorter one would save nothing and fail slow steps.
+    Timed-out waits are recorded at their timeout so slow steps raise it.
+    """
+
+    def __init__(self, path=LATENCY_FILE, window=50, min_samples=5,
+                 factor=3.0, max_timeout=60.0):
+        self.path = path
+        self.window = window
+        self.min_samples = min_samples
+        self.factor = factor
+        self.max_timeout = max_timeout
+        self._lock = threading.Lock()
+        self._samples = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return {step: list(samples) for step, samples in json.load(f).items()}
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, step, seconds):
+        with self._lock:
+            samples = self._samples.setdefault(step, [])
+            samples.append(round(seconds, 3))
+            del samples[:-self.window]
+
+    def timeout_for(self, step, default=DEFAULT_WAIT_TIMEOUT):
+        with self._lock:
+            samples = sorted(self._samples.get(step, []))
+        if len(samples) < self.min_samples:
+            return default
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return min(self.max_timeout, max(default, p95 * self.factor))
+
+    def summary(self):
+        with self._lock:
+            return {step: samples[-1] for step, samples in self._samples.items() if samples}
+
+    def save(self):
+        with self._lock:
+            data = dict(self._samples)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            log(f"Warning: Could not save wait latencies: {e}")
+
+
+latency_tracker = LatencyTracker()
+
+
+def wait_for(driver, step, condition, timeout=None):
+    """Wait until `condition(driver)` is truthy, recording how long step took."""
+    timeout = timeout or latency_tracker.timeout_for(step)
+    start = time.perf_counter()
+    try:
+        result = WebDriverWait(
+            driver, timeout, poll_frequency=POLL_INTERVAL,
+            ignored_exceptions=(StaleElementReferenceException,)
+        ).until(condition)
+    except TimeoutException:
+        # A lower bound of the real latency, enough to push the next timeout up
+        latency_tracker.record(step, time.perf_counter() - start)
+        raise
+    latency_tracker.record(step, time.perf_counter() - start)
+    return result
+
+def dom_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+def spinners_gone(driver):
+    return not any(e.is_displayed() for e in driver.find_elements(By.XPATH, SPINNER_XPATH))
+
+def wait_for_page_ready(driver, step, timeout=None):
+    """Wait for the document to load and every loading spinner to disappear."""
+    return wait_for(driver, step, lambda d: dom_ready(d) and spinners_gone(d), timeout)
+
+def wait_for_visible(driver, step, xpath, timeout=None):
+    return wait_for(driver, step, EC.visibility_of_element_located((By.XPATH, xpath)), timeout)
+
+def wait_for_present(driver, step, by, value, timeout=None):
+    return wait_for(driver, step, EC.presence_of_element_located((by, value)), timeout)
+
+def wait_for_toast(driver, step, timeout=None):
+    """Wait for a toast/alert and return its text, or None if none showed up."""
+    try:
+        toast = wait_for_visible(driver, step, TOAST_XPATH, timeout)
+    except TimeoutException:
+        log(f"⚠️ No confirmation message after {step}")
+        return None
+    text = (toast.get_attribute("aria-label") or toast.text or "").strip()
+    log(f"Message after {step}: {text}")
+    return text
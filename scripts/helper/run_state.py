@@ -0,0 +1,42 @@
+import json
+import os
+import threading
+
+from scripts.helper.common_utils import log
+
+
+_lock = threading.Lock()
+
+
+def state_path(location, name):
+    """Where a piece of per-location run state lives: <location>/state/<name>.json."""
+    return os.path.join(os.getcwd(), location, "state", f"{name}.json")
+
+def load_state(location, name, default=None):
+    path = state_path(location, name)
+    with _lock:
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+        except ValueError as e:
+            log(f"Warning: Ignoring unreadable state file {path}: {e}")
+            return default
+
+def save_state(location, name, data):
+    """Write state atomically so an interrupted run never leaves half a file."""
+    path = state_path(location, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with _lock:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+def clear_state(location, name):
+    with _lock:
+        try:
+            os.remove(state_path(location, name))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,197 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+from scripts.helper.browser_manager import create_driver, driver_rss_mb
+from scripts.helper.common_utils import load_credentials, log
+from scripts.helper.fronocloud_login import is_logged_out, open_stock_in_out
+from scripts.helper.page_waits import wait_for_page_ready
+
+
+# Warm drivers kept per location (0 disables pooling)
+SESSION_POOL_SIZE = int(os.environ.get("FRONO_SESSION_POOL_SIZE", 1))
+# Recycle a driver after this many runs or once Chrome uses more memory than this
+SESSION_MAX_RUNS = int(os.environ.get("FRONO_SESSION_MAX_RUNS", 20))
+SESSION_MAX_RSS_MB = float(os.environ.get("FRONO_SESSION_MAX_RSS_MB", 1500))
+# Seconds to wait for a busy location's session before giving up
+SESSION_ACQUIRE_TIMEOUT = float(os.environ.get("FRONO_SESSION_ACQUIRE_TIMEOUT", 1800))
+
+
+class PooledSession:
+    def __init__(self, driver, stock_url):
+        self.driver = driver
+        self.stock_url = stock_url
+        self.runs = 0
+        self.created_at = time.time()
+
+
+class SessionPool:
+    """Logged-in Chrome sessions for one location, reused across runs.
+
+    session() hands out a driver already on /stockinout. Sessions are health
+    checked and re-logged in when FronoCloud has expired them, and recycled
+    after `max_runs` runs or when their memory passes `max_rss_mb`. Waiting
+    for a session raises TimeoutError after `acquire_timeout` seconds.
+    """
+
+    def __init__(self, location, download_dir, size=SESSION_POOL_SIZE,
+                 max_runs=SESSION_MAX_RUNS, max_rss_mb=SESSION_MAX_RSS_MB,
+                 acquire_timeout=SESSION_ACQUIRE_TIMEOUT):
+        self.location = location
+        self.download_dir = download_dir
+        self.size = max(1, size)
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def session(self):
+        pooled = self._checkout()
+        healthy = True
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self._release(pooled, healthy)
+
+    def _checkout(self):
+        """Acquire a session that passed its health check, replacing dead ones."""
+        while True:
+            pooled = self._acquire()
+            try:
+                self._prepare(pooled)
+                return pooled
+            except Exception as e:
+                # Includes a dead chromedriver (urllib3 errors) and failed re-logins,
+                # which must give the slot back as much as a WebDriverException does
+                log(f"⚠️ Browser session for {self.location} failed health check: {e}")
+                self._release(pooled, healthy=False)
+
+    def _acquire(self):
+        with self._cond:
+            available = self._cond.wait_for(
+                lambda: self._idle or self._created < self.size, timeout=self.acquire_timeout
+            )
+            if not available:
+                raise TimeoutError(
+                    f"No browser session for {self.location} became free within {self.acquire_timeout:g}s"
+                )
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return self._new_session()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _new_session(self):
+        log(f"Starting browser session for {self.location}...")
+        username, password = load_credentials(self.location)
+        driver = create_driver(download_path=self.download_dir)
+        try:
+            stock_url = open_stock_in_out(driver, username, password)
+        except Exception:
+            driver.quit()
+            raise
+        return PooledSession(driver, stock_url)
+
+    def _prepare(self, pooled):
+        """Make sure a reused session is alive, logged in and on /stockinout."""
+        if pooled.runs == 0:
+            return
+        driver = pooled.driver
+        driver.get(pooled.stock_url)
+        wait_for_page_ready(driver, "stock in/out page")
+        if is_logged_out(driver):
+            log(f"Session for {self.location} expired, logging in again...")
+            username, password = load_credentials(self.location)
+            pooled.stock_url = open_stock_in_out(driver, username, password)
+
+    def _should_recycle(self, pooled):
+        if pooled.runs >= self.max_runs:
+            return f"reached {pooled.runs} runs"
+        rss = driver_rss_mb(pooled.driver)
+        if rss is not None and rss > self.max_rss_mb:
+            return f"using {rss:.0f} MB"
+        return None
+
+    def _release(self, pooled, healthy):
+        pooled.runs += 1
+        reason = "unhealthy" if not healthy else self._should_recycle(pooled)
+        if reason is None and not self._closed:
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+            return
+
+        log(f"Recycling browser session for {self.location} ({reason or 'pool closed'})")
+        self._quit(pooled)
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _quit(pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            # A dead chromedriver can't be asked to quit; the slot is freed regardless
+            log(f"Warning: Could not quit browser cleanly: {e}")
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for pooled in idle:
+            self._quit(pooled)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_session_pool(location, download_dir):
+    with _pools_lock:
+        pool = _pools.get(location)
+        if pool is None:
+            pool = _pools[location] = SessionPool(location, download_dir)
+        return pool
+
+def close_session_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+atexit.register(close_session_pools)
+
+@contextmanager
+def browser_session(location, download_dir):
+    """Yield a logged-in driver on /stockinout, pooled unless FRONO_SESSION_POOL_SIZE=0."""
+    if SESSION_POOL_SIZE > 0:
+        with get_session_pool(location, download_dir).session() as driver:
+            yield driver
+        return
+
+    username, password = load_credentials(location)
+    driver = create_driver(download_path=download_dir)
+    try:
+        open_stock_in_out(driver, username, password)
+        yield driver
+    finally:
+        log("Closing browser...")
+        driver.quit()
@@ -0,0 +1,150 @@
+import re
+
+from scripts.helper.common_utils import log
+
+
+DIRECTIONS = {"stock in": "in", "stock out": "out"}
+DIRECTION_LABELS = {"in": "Stock In", "out": "Stock Out"}
+
+# Legacy dict keys -> SheetItem attributes, so item['Qty'] keeps working
+LEGACY_KEYS = {
+    "Design No.": "design_no",
+    "Color": "color",
+    "Size": "size",
+    "Qty": "qty",
+    "Price": "price",
+}
+
+# Widest size group a sheet row may name; each size becomes a row when matching
+MAX_SIZE_GROUP_SPAN = 50
+MAX_REPORTED_ROWS = 20
+FIRST_SHEET_ROW = 2  # The items range starts below the header row
+
+_NUMBER_JUNK_RE = re.compile(r"[,\s₹]")
+
+
+def parse_number(value):
+    """Parse a sheet number like '1,200' or '₹ 350.50'; integral values come back as int."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = float(value)
+    else:
+        text = _NUMBER_JUNK_RE.sub("", str(value or ""))
+        if not text:
+            raise ValueError("is empty")
+        try:
+            number = float(text)
+        except ValueError:
+            raise ValueError(f"is not a number: {value!r}") from None
+    if number != number or number in (float("inf"), float("-inf")):
+        raise ValueError(f"is not a number: {value!r}")
+    return int(number) if number.is_integer() else number
+
+def parse_size_group(sheet_size_group):
+    """Parse a sheet size group into an inclusive (start, end) interval.
+
+    '38-44' -> (38, 44), '40' -> (40, 40). Returns None for anything that
+    can't be parsed, so it never matches.
+    """
+    try:
+        if '-' in sheet_size_group:
+            start, end = map(int, sheet_size_group.split('-'))
+            return start, end
+        else:
+            size = int(sheet_size_group)
+            return size, size
+    except (ValueError, TypeError):
+        return None
+
+
+class SheetItem:
+    """One parsed row of the items sheet.
+
+    Numbers, the stock direction ('in' / 'out') and the size interval are
+    parsed once here. item['Design No.'] style access is kept for code written
+    against the old row dicts.
+    """
+
+    __slots__ = ("design_no", "color", "size", "qty", "price", "direction", "size_group", "row")
+
+    def __init__(self, design_no, color, size, qty, price, direction, size_group, row=None):
+        self.design_no = design_no
+        self.color = color
+        self.size = size
+        self.qty = qty
+        self.price = price
+        self.direction = direction
+        self.size_group = size_group
+        self.row = row
+
+    @classmethod
+    def from_row(cls, values, row=None):
+        """Build an item from raw sheet cells, raising ValueError naming every bad field."""
+        cells = [str(value).strip() for value in values[:6]]
+        cells += [""] * (6 - len(cells))
+        design_no, color, size, qty, price, direction = cells
+
+        problems = []
+        if not design_no:
+            problems.append("Design No. is empty")
+        if not color:
+            problems.append("Color is empty")
+        size_group = parse_size_group(size)
+        if size_group is None or size_group[0] > size_group[1]:
+            problems.append(f"Size is not a size or size group: {size!r}")
+        elif size_group[1] - size_group[0] + 1 > MAX_SIZE_GROUP_SPAN:
+            problems.append(f"Size group {size!r} spans more than {MAX_SIZE_GROUP_SPAN} sizes")
+        try:
+            qty = parse_number(qty)
+        except ValueError as e:
+            problems.append(f"Qty {e}")
+        try:
+            # Price may be left blank, e.g. on stock out rows
+            price = parse_number(price) if price else None
+        except ValueError as e:
+            problems.append(f"Price {e}")
+        normalised = DIRECTIONS.get(" ".join(direction.lower().split()))
+        if normalised is None:
+            problems.append(f"Stock In / Out is not 'Stock In' or 'Stock Out': {direction!r}")
+        if problems:
+            raise ValueError("; ".join(problems))
+        return cls(design_no, color, size, qty, price, normalised, size_group, row)
+
+    def __getitem__(self, key):
+        if key == "Stock In / Out":
+            return DIRECTION_LABELS[self.direction]
+        try:
+            return getattr(self, LEGACY_KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __repr__(self):
+        return (f"SheetItem({self.design_no!r}, {self.color!r}, {self.size!r}, "
+                f"qty={self.qty!r}, price={self.price!r}, {self.direction!r}, row={self.row})")
+
+
+def parse_sheet_items(values, first_row=FIRST_SHEET_ROW):
+    """Parse raw sheet rows into SheetItems.
+
+    Returns (items, malformed) where malformed lists (sheet row, reason) for
+    every non-blank row that could not be parsed.
+    """
+    items = []
+    malformed = []
+    for offset, cells in enumerate(values):
+        row = first_row + offset
+        if not any(str(cell).strip() for cell in cells):
+            continue
+        try:
+            items.append(SheetItem.from_row(cells, row))
+        except ValueError as e:
+            malformed.append((row, str(e)))
+    return items, malformed
+
+def report_malformed_rows(malformed, limit=MAX_REPORTED_ROWS):
+    """Log all malformed rows in one block instead of failing on them one by one."""
+    if not malformed:
+        return
+    lines = [f"  row {row}: {reason}" for row, reason in malformed[:limit]]
+    if len(malformed) > limit:
+        lines.append(f"  ... and {len(malformed) - limit} more")
+    log(f"⚠️ Skipped {len(malformed)} malformed sheet rows:\n" + "\n".join(lines))
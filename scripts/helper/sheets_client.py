@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+
+from scripts.helper.common_utils import log
+
+
+SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+SHEETS_HTTP_TIMEOUT = int(os.environ.get("SHEETS_HTTP_TIMEOUT", 60))
+
+_lock = threading.Lock()
+_credentials = None
+_service = None
+# httplib2.Http isn't thread-safe, so each thread keeps its own keep-alive connection
+_thread_local = threading.local()
+_last_fetch = {}
+
+
+def get_google_credentials():
+    """
+    Get Google credentials from environment or service account file.
+    The service-account file is read once per process; the returned
+    credentials refresh their access token on their own when it expires.
+    """
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            if not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
+                if os.path.exists("service_account_key.json"):
+                    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "service_account_key.json"
+                    log("✅ Set GOOGLE_APPLICATION_CREDENTIALS for local run.")
+                else:
+                    raise EnvironmentError("No Google credentials found. Please set GOOGLE_APPLICATION_CREDENTIALS or provide service_account_key.json")
+
+            _credentials = service_account.Credentials.from_service_account_file(
+                os.environ["GOOGLE_APPLICATION_CREDENTIALS"],
+                scopes=SHEETS_SCOPES
+            )
+        return _credentials
+
+def get_sheets_service():
+    """Process-wide Sheets API client built from the bundled discovery document."""
+    global _service
+    credentials = get_google_credentials()
+    with _lock:
+        if _service is None:
+            _service = build(
+                'sheets', 'v4', credentials=credentials,
+                static_discovery=True, cache_discovery=False
+            )
+        return _service
+
+def _authorized_http():
+    http = getattr(_thread_local, "http", None)
+    if http is None:
+        http = google_auth_httplib2.AuthorizedHttp(
+            get_google_credentials(), http=httplib2.Http(timeout=SHEETS_HTTP_TIMEOUT)
+        )
+        _thread_local.http = http
+    return http
+
+def get_sheet_values(spreadsheet_id, range_name, num_retries=2):
+    """Read a range over this thread's pooled connection and record how long it took."""
+    start = time.perf_counter()
+    result = get_sheets_service().spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id,
+        range=range_name
+    ).execute(http=_authorized_http(), num_retries=num_retries)
+    seconds = time.perf_counter() - start
+
+    values = result.get('values', [])
+    with _lock:
+        _last_fetch.update(range=range_name, rows=len(values), seconds=round(seconds, 3))
+    log(f"Fetched {len(values)} rows from {range_name} in {seconds:.2f}s")
+    return values
+
+def last_fetch_stats():
+    """Range, row count and duration of the most recent get_sheet_values call."""
+    with _lock:
+        return dict(_last_fetch)
+
+def reset_sheets_client():
+    """Drop cached credentials and client, e.g. after rotating the service-account key."""
+    global _credentials, _service
+    with _lock:
+        _credentials = None
+        _service = None
+    _thread_local.__dict__.clear()
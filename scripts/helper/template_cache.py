@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from scripts.helper.common_utils import file_sha256, log
+from scripts.helper.download_store import STORE_DIR, DownloadStore
+from scripts.helper.frame_cache import frame_cache
+
+
+# How long a downloaded item template is trusted before it is fetched again
+TEMPLATE_CACHE_TTL = int(os.environ.get("TEMPLATE_CACHE_TTL", 6 * 60 * 60))
+# Sheet items missing from a template younger than this are logged as unmatched instead
+# of triggering a download; a typo in the sheet must not cost a browser download every run
+TEMPLATE_REFRESH_AFTER = int(os.environ.get("TEMPLATE_REFRESH_AFTER", 30 * 60))
+# Number of parsed templates kept in memory
+TEMPLATE_CACHE_SIZE = int(os.environ.get("TEMPLATE_CACHE_SIZE", 4))
+# Download store kind the item template is filed under
+TEMPLATE_KIND = "stock_template"
+
+
+class TemplateCache:
+    """Keep the item template fresh on disk and parsed in memory.
+
+    Parsed DataFrames are keyed by the file's content hash, so a template that
+    was re-downloaded without changes is not parsed again. A template on disk
+    is considered fresh for `ttl` seconds after it was downloaded, or until
+    invalidate() is called for its download directory.
+    """
+
+    def __init__(self, ttl=TEMPLATE_CACHE_TTL, max_entries=TEMPLATE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._frames = OrderedDict()  # content hash -> DataFrame
+        self._hashes = {}             # (path, mtime_ns, size) -> content hash
+        self._invalidated_at = {}     # download dir (None = all) -> timestamp
+
+    @staticmethod
+    def latest_template(download_dir):
+        """Return the most recently downloaded template in download_dir's store, or None."""
+        store = DownloadStore(download_dir)
+        # Loose files (e.g. from before the store existed) are filed first
+        store.sweep(TEMPLATE_KIND)
+        record = store.latest(TEMPLATE_KIND)
+        return store.path(record) if record is not None else None
+
+    def is_fresh(self, file_path):
+        """A template is fresh if it is younger than the TTL and newer than any invalidation."""
+        download_dir = os.path.dirname(os.path.abspath(file_path))
+        if os.path.basename(download_dir) == STORE_DIR:
+            download_dir = os.path.dirname(download_dir)
+        mtime = os.path.getmtime(file_path)
+        with self._lock:
+            invalidated_at = max(
+                self._invalidated_at.get(download_dir, 0),
+                self._invalidated_at.get(None, 0)
+            )
+        return mtime > invalidated_at and time.time() - mtime < self.ttl
+
+    @staticmethod
+    def age(file_path):
+        """Seconds since the template was downloaded."""
+        return time.time() - os.path.getmtime(file_path)
+
+    def content_hash(self, file_path):
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_sha256(file_path)
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def get(self, download_dir):
+        """Return (DataFrame, path) for a fresh template, or None if a download is needed."""
+        file_path = self.latest_template(download_dir)
+        if file_path is None or not self.is_fresh(file_path):
+            return None
+        return self.load(file_path), file_path
+
+    def load(self, file_path):
+        """Return a copy of the parsed template, parsing it only on a cache miss."""
+        digest = self.content_hash(file_path)
+        with self._lock:
+            df = self._frames.get(digest)
+            if df is not None:
+                self._frames.move_to_end(digest)
+                return df.copy()
+
+        df = frame_cache.read_excel(file_path, skip_blank=False)
+        self._store(digest, df)
+        return df.copy()
+
+    def put(self, file_path, df):
+        """Register a freshly downloaded and parsed template."""
+        self._store(self.content_hash(file_path), df.copy())
+
+    def invalidate(self, download_dir=None):
+        """Force the next lookup to download again (for one directory, or all)."""
+        key = os.path.abspath(download_dir) if download_dir else None
+        with self._lock:
+            self._invalidated_at[key] = time.time()
+            if key is None:
+                self._frames.clear()
+                self._hashes.clear()
+        log(f"Template cache invalidated: {download_dir or 'all locations'}")
+
+    def _store(self, digest, df):
+        with self._lock:
+            self._frames[digest] = df
+            self._frames.move_to_end(digest)
+            while len(self._frames) > self.max_entries:
+                self._frames.popitem(last=False)
+
+
+template_cache = TemplateCache()
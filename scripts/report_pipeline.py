@@ -0,0 +1,237 @@
+import datetime
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scripts.helper.bigquery_uploader import BigQueryUploadError, get_uploader, register_incremental
+from scripts.helper.common_utils import capture_run_logs, load_dataframe, log, submit_in_context
+from scripts.helper.download_store import DownloadStore
+
+
+# Report files parsed at the same time across all locations
+REPORT_WORKERS = int(os.environ.get("FRONO_REPORT_WORKERS", 4))
+# Download store consumer name for exports that made it into BigQuery
+PROCESSED_BY = "bigquery"
+
+# "AMOHA TRENDZ[Surat]Broker Name :M P TEXTILES"
+AR_PARTY_RE = re.compile(r"^(?P<customer>.*?)\s*(?:\[(?P<city>[^\]]*)\])?\s*Broker Name\s*:\s*(?P<broker>.*)$")
+
+
+class ReportType:
+    """How one FronoCloud export is found, parsed, cleaned and loaded.
+
+    `folder` is the download folder under <location>/, `pattern` matches the
+    exports inside it (filed into the folder's download store; the newest wins), `parse` turns the raw sheet into
+    rows and `table` is the BigQuery table (prefixed with the location). With
+    a business `key` and a `partition_field` the table is loaded incrementally.
+    """
+
+    def __init__(self, name, folder, pattern, parse, table, key=None, partition_field=None):
+        self.name = name
+        self.folder = folder
+        self.pattern = pattern
+        self.parse = parse
+        self.table = table
+        self.key = key
+        self.partition_field = partition_field
+
+
+REPORT_TYPES = {}
+
+def register_report(report):
+    REPORT_TYPES[report.name] = report
+    if report.key and report.partition_field:
+        register_incremental(report.table, report.key, report.partition_field)
+    return report
+
+def snake_case(name):
+    return re.sub(r"[^0-9a-z]+", "_", str(name).strip().lower()).strip("_")
+
+def clean_frame(df):
+    """Shared cleaning: snake_case columns, trimmed text and no fully empty columns."""
+    df = df.dropna(axis=1, how="all").copy()
+    df.columns = [snake_case(column) for column in df.columns]
+    for column in df.columns[df.dtypes == object]:
+        df[column] = df[column].map(lambda value: value.strip() if isinstance(value, str) else value)
+    return df
+
+def parse_dates(values, format=None):
+    return pd.to_datetime(values, format=format, dayfirst=format is None, errors="coerce")
+
+def parse_ar_bill_wise(path):
+    """AR Detailed Bill-Wise: bills grouped under customer rows, each group closed by a Total row."""
+    df = load_dataframe(path).rename(columns={"Unnamed: 1": "Type"})
+    first = df["Date"].astype(str).str.strip()
+    dates = parse_dates(df["Date"], format="%d/%m/%Y")
+
+    # Customer headings are the rows whose first cell is neither a date nor a total
+    heading = dates.isna() & ~first.str.fullmatch(r"(?i)(grand )?total") & df["Voucher Number"].isna()
+    parties = first.where(heading).str.extract(AR_PARTY_RE)
+    parties.loc[heading & parties["customer"].isna(), "customer"] = first[heading]
+    parties = parties.astype("string").ffill().astype(object).where(lambda frame: frame.notna())
+
+    # Every dated row is a bill, including the odd one exported without a voucher number
+    bills = dates.notna()
+    df = df[bills].assign(
+        Date=dates[bills],
+        **{"Due Date": parse_dates(df.loc[bills, "Due Date"], format="%d/%m/%Y")},
+        Customer=parties.loc[bills, "customer"],
+        City=parties.loc[bills, "city"].replace("", np.nan),
+        Broker=parties.loc[bills, "broker"].replace("", np.nan),
+    )
+    for column in ("Total Amt", "Adjusted Amt", "Balance", "Days"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    df["Voucher Number"] = df["Voucher Number"].astype(str).where(df["Voucher Number"].notna())
+    # Voucher-less bills can share customer and date; number them so each keeps its own key
+    df["Bill Seq"] = df.groupby(["Customer", "Voucher Number", "Date"], dropna=False).cumcount()
+    return clean_frame(df)
+
+def parse_purchase_invoice(path):
+    """PurchaseInvoice: one row per invoice, a blank first column, an Action column and a Grand Total row."""
+    df = load_dataframe(path)
+    df = df.drop(columns=[column for column in df.columns
+                          if str(column).startswith("Unnamed:") or column == "Action"])
+    df = df[df["Voucher No"].notna()].copy()
+    df["Date"] = parse_dates(df["Date"], format="%d/%m/%Y")
+    df["Inv Date"] = parse_dates(df["Inv Date"], format="%d/%m/%Y")
+    df["Created Date"] = parse_dates(df["Created Date"], format="%d/%m/%Y %I:%M %p")
+    for column in ("Qty", "Inv Total"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    for column in ("Voucher No", "Invoice No"):
+        df[column] = df[column].astype(str)
+    return clean_frame(df)
+
+
+register_report(ReportType(
+    "ar_bill_wise", "Frono_Account_Receivable_Report", "AR-Detailed-Bill-Wise-Report*.xlsx",
+    parse_ar_bill_wise, "ar_bill_wise",
+    # Outstanding bills as of each report date; re-running a day replaces that day's rows
+    key=("report_date", "customer", "voucher_number", "date", "bill_seq"), partition_field="report_date",
+))
+register_report(ReportType(
+    "purchase_invoice", "Frono_Sales_Invoice_Report", "PurchaseInvoice*.xlsx",
+    parse_purchase_invoice, "purchase_invoice",
+    key="voucher_no", partition_field="date",
+))
+
+
+def latest_report_file(location, report):
+    """File new exports of a report type into the location's store and return the newest record."""
+    store = DownloadStore(os.path.join(os.getcwd(), location, report.folder), location)
+    store.sweep(report.name, report.pattern)
+    return store, store.latest(report.name)
+
+def report_locations():
+    """Locations that have at least one registered report folder on disk."""
+    root = os.getcwd()
+    return sorted(
+        name for name in os.listdir(root)
+        if any(os.path.isdir(os.path.join(root, name, report.folder)) for report in REPORT_TYPES.values())
+    )
+
+def ingest_report(location, report, force=False):
+    """Parse one location's newest export and tag it with where and when it came from.
+
+    Returns (df, store, record). df is None when there is no export, or when
+    this exact content was already loaded and force isn't set.
+    """
+    store, record = latest_report_file(location, report)
+    if record is None:
+        return None, store, None
+    if not force and store.is_processed(record["sha256"], PROCESSED_BY):
+        log(f"Skipping {report.name} for {location}: {record['original_name']} was already loaded")
+        return None, store, record
+    path = store.path(record)
+    start = time.time()
+    df = report.parse(path)
+    df.insert(0, "location", location)
+    df.insert(1, "report_date", datetime.date.fromtimestamp(record["last_fetched_at"]))
+    log(f"📄 Parsed {len(df)} rows from {record['original_name']} in {time.time() - start:.2f}s")
+    return df, store, record
+
+def run_report_pipeline(locations=None, reports=None, upload=True, max_workers=None, force=False):
+    """Ingest every (location, report) export concurrently, then load each location in one batch.
+
+    Exports whose content was already loaded are skipped unless force is set,
+    and exports without rows are not loaded. Each table succeeds or fails on
+    its own. Returns {location: {report: {"status", "rows", "file", "error"}}}.
+    """
+    locations = list(dict.fromkeys(locations or report_locations()))
+    report_types = [REPORT_TYPES[name] for name in (reports or REPORT_TYPES)]
+    start = time.time()
+    log(f"Running report pipeline for {', '.join(locations)}: {', '.join(r.name for r in report_types)}")
+
+    results = {location: {} for location in locations}
+    frames = {location: {} for location in locations}
+    loaded = {location: {} for location in locations}
+    with ThreadPoolExecutor(max_workers=max_workers or REPORT_WORKERS) as executor:
+        futures = {
+            (location, report): submit_in_context(executor, ingest_report, location, report, force)
+            for location in locations for report in report_types
+        }
+        for (location, report), future in futures.items():
+            try:
+                df, store, record = future.result()
+            except Exception as e:
+                log(f"❌ Could not parse {report.name} for {location}: {e}")
+                results[location][report.name] = {"status": "failed", "rows": 0, "file": None, "error": str(e)}
+                continue
+            if df is None:
+                results[location][report.name] = {
+                    "status": "unchanged" if record else "missing", "rows": 0,
+                    "file": record["original_name"] if record else None, "error": None
+                }
+                continue
+            if df.empty:
+                # e.g. an export holding only the Grand Total row: nothing to load
+                log(f"No rows in {record['original_name']} for {location}, nothing to load")
+                if upload:
+                    store.mark_processed(record["sha256"], PROCESSED_BY)
+                results[location][report.name] = {
+                    "status": "empty", "rows": 0, "file": record["original_name"], "error": None
+                }
+                continue
+            frames[location][report.table] = df
+            loaded[location][report.table] = (store, record)
+            results[location][report.name] = {
+                "status": "parsed", "rows": len(df), "file": record["original_name"], "error": None
+            }
+
+    if upload:
+        for location, tables in frames.items():
+            if not tables:
+                continue
+            try:
+                get_uploader(location).upload_many(tables)
+                errors = {}
+            except BigQueryUploadError as e:
+                log(f"❌ BigQuery load failed for {location}: {e}")
+                errors = {table: str(error) for table, error in e.errors.items()}
+            except Exception as e:
+                log(f"❌ BigQuery load failed for {location}: {e}")
+                errors = {table: str(e) for table in tables}
+            # One bad export doesn't hold back the tables that did load
+            for report in report_types:
+                if report.table not in tables:
+                    continue
+                error = errors.get(report.table)
+                if error is None:
+                    store, record = loaded[location][report.table]
+                    store.mark_processed(record["sha256"], PROCESSED_BY)
+                results[location][report.name].update(status="failed" if error else "loaded", error=error)
+
+    log(f"⏱️ Report pipeline finished in {time.time() - start:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    with capture_run_logs():
+        summary = run_report_pipeline(sys.argv[1:] or None)
+    for location, reports in summary.items():
+        for name, result in reports.items():
+            print(f"{location:10} {name:18} {result['status']:8} {result['rows']:6} {result['error'] or ''}")
@@ -1,18 +1,32 @@
+import hashlib
+import json
 import os
+import re
 import time
+from collections import Counter
+from contextlib import nullcontext
+import numpy as np
 import pandas as pd
+import requests
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 from functools import wraps
 
-from scripts.helper.browser_manager import create_driver
-from scripts.helper.common_utils import load_credentials, log
-from scripts.helper.fronocloud_login import login
-
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from scripts.helper.common_utils import StageTimer, download_snapshot, log, unknown_locations, wait_for_new_download
+from scripts.helper.frame_cache import frame_cache
+from scripts.helper.download_store import DownloadStore
+from scripts.helper.excel_writer import write_import_workbook
+from scripts.helper.frono_http import FronoHttpClient, FronoImportError, http_import_enabled, request_not_sent
+from scripts.helper.page_waits import (
+    latency_tracker, wait_for_page_ready, wait_for_present, wait_for_toast
+)
+from scripts.helper.run_state import clear_state, load_state, save_state
+from scripts.helper.session_pool import browser_session
+from scripts.helper.sheet_items import MAX_SIZE_GROUP_SPAN, parse_sheet_items, parse_size_group, report_malformed_rows
+from scripts.helper.sheets_client import get_sheet_values
+from scripts.helper.template_cache import TEMPLATE_KIND, TEMPLATE_REFRESH_AFTER, template_cache
 
 
 
@@ -20,69 +34,51 @@ from googleapiclient.discovery import build
 DEFAULT_TIMEOUT = 10
 DEFAULT_DELAY = 1
 MAX_RETRIES = 3
+DOWNLOAD_TIMEOUT = 30
 
+# Old item templates kept in the download store
+TEMPLATES_KEPT = 2
 
-def get_google_credentials():
-    """
-    Get Google credentials from environment or service account file.
-    Returns service account credentials for Google Sheets API.
-    """
-    if not os.environ.get("GOOGLE_APPLICATION_CREDENTIALS"):
-        if os.path.exists("service_account_key.json"):
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "service_account_key.json"
-            log("✅ Set GOOGLE_APPLICATION_CREDENTIALS for local run.")
-        else:
-            raise EnvironmentError("No Google credentials found. Please set GOOGLE_APPLICATION_CREDENTIALS or provide service_account_key.json")
+# Import lines per uploaded workbook; larger batches are split and checkpointed
+IMPORT_CHUNK_ROWS = int(os.getenv("FRONO_IMPORT_CHUNK_ROWS", "2000"))
+
+# Toast text that confirms a browser upload was applied; anything else counts as unconfirmed
+IMPORT_SUCCESS_PATTERN = re.compile(
+    os.getenv("FRONO_IMPORT_SUCCESS_PATTERN", r"success|imported|uploaded|saved"), re.IGNORECASE
+)
+IMPORT_ERROR_WORDS = ("error", "fail", "invalid")
 
-    return service_account.Credentials.from_service_account_file(
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"],
-        scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
-    )
+
+SHEET_RANGE = 'Sheet2!A2:F'  # Assuming headers are in row 1
+
+def fetch_sheet_values():
+    """Fetch the raw rows of the items sheet."""
+    # The ID of the spreadsheet to retrieve data from
+    SPREADSHEET_ID = os.environ.get('ITEMS_SPREADSHEET_ID')
+    if not SPREADSHEET_ID:
+        raise EnvironmentError("ITEMS_SPREADSHEET_ID environment variable not set")
+
+    # Call the Sheets API through the shared client
+    return get_sheet_values(SPREADSHEET_ID, SHEET_RANGE)
+
+def parse_sheet_values(values):
+    """Turn raw sheet rows into SheetItems, logging malformed rows in one go."""
+    items, malformed = parse_sheet_items(values)
+    report_malformed_rows(malformed)
+    return items
 
 def fetch_items_from_sheet():
     """
     Fetch items data from a Google Sheet.
-    The sheet should have columns: Design No., Unit, HSN Code, Colors, Sizes
-    Colors and Sizes should be comma-separated values in their respective cells.
+    The sheet should have columns: Design No., Color, Size, Qty, Price, Stock In / Out
     """
     try:
-        # Get credentials and build service
-        credentials = get_google_credentials()
-        service = build('sheets', 'v4', credentials=credentials)
-
-        # The ID of the spreadsheet to retrieve data from
-        SPREADSHEET_ID = os.environ.get('ITEMS_SPREADSHEET_ID')
-        if not SPREADSHEET_ID:
-            raise EnvironmentError("ITEMS_SPREADSHEET_ID environment variable not set")
-
-        # The range of the sheet to retrieve data from (e.g., 'Sheet1!A2:E')
-        RANGE_NAME = 'Sheet2!A2:F'  # Assuming headers are in row 1
-        
-        # Call the Sheets API
-        result = service.spreadsheets().values().get(
-            spreadsheetId=SPREADSHEET_ID,
-            range=RANGE_NAME
-        ).execute()
-
-        values = result.get('values', [])
+        values = fetch_sheet_values()
         if not values:
             log("No data found in the spreadsheet.")
             return []
 
-        # Process the data
-        items = []
-        for row in values:
-            if len(row) > 2:  # Ensure we have all required columns
-                item = {
-                    'Design No.': row[0],
-                    'Color': row[1],
-                    'Size': row[2],
-                    'Qty': row[3],
-                    'Price': row[4],
-                    'Stock In / Out': row[5]
-                }
-                items.append(item)
-
+        items = parse_sheet_values(values)
         log(f"Successfully fetched {len(items)} items from Google Sheet")
         return items
 
@@ -90,6 +86,26 @@ def fetch_items_from_sheet():
         log(f"Error fetching items from Google Sheet: {e}")
         return []
 
+def sheet_fingerprint(values):
+    """Content hash of the whole sheet plus one short hash per row."""
+    row_hashes = [
+        hashlib.sha256(json.dumps(row, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+        for row in values
+    ]
+    digest = hashlib.sha256("\n".join(row_hashes).encode("ascii")).hexdigest()
+    return {"hash": digest, "rows": row_hashes}
+
+def sheet_changed(location, fingerprint):
+    """Compare against the sheet contents of the last successful run for location."""
+    previous = load_state(location, "sheet_fingerprint")
+    if previous is None:
+        return True
+    if previous.get("hash") == fingerprint["hash"]:
+        return False
+    changed = sum((Counter(fingerprint["rows"]) - Counter(previous.get("rows", []))).values())
+    log(f"Items sheet changed since last run: {changed} new or edited rows")
+    return True
+
 # print(fetch_items_from_sheet())
 
 def retry_on_failure(max_attempts=3, delay=1):
@@ -128,103 +144,119 @@ def wait_and_send_keys(driver, xpath, keys, timeout=10):
 
 
 
-def is_size_in_group(excel_size, sheet_size_group):
-    """Check if a size falls within a size group (e.g., '38.0' is in '38-44')."""
+def parse_size(excel_size):
+    """Round a template size (e.g. 38.0) to the integer used for group matching."""
     try:
-        # Convert excel_size to float and round to nearest integer
-        size = round(float(excel_size))
-        
-        # Parse the size group (e.g., '38-44' -> [38, 44])
-        if '-' in sheet_size_group:
-            start, end = map(int, sheet_size_group.split('-'))
-            return start <= size <= end
-        else:
-            # If it's a single size, do exact match
-            return size == int(sheet_size_group)
+        return round(float(excel_size))
     except (ValueError, TypeError):
+        return None
+
+def is_size_in_group(excel_size, sheet_size_group):
+    """Check if a size falls within a size group (e.g., '38.0' is in '38-44')."""
+    size = parse_size(excel_size)
+    interval = parse_size_group(sheet_size_group)
+    if size is None or interval is None:
         return False
+    return interval[0] <= size <= interval[1]
 
-def read_excel_data(download_dir):
-    """Read and process Excel file from the download directory."""
-    try:
-        # Remove all existing Excel files
-        for file in os.listdir(download_dir):
-            if file.endswith('.xlsx'):
-                try:
-                    os.remove(os.path.join(download_dir, file))
-                    log(f"Removed file: {file}")
-                except Exception as e:
-                    log(f"Warning: Could not remove file {file}: {e}")
-        
-        time.sleep(4)  # Wait for new download
+def read_excel_frame(download_dir, before=None):
+    """Wait for a fresh Excel download, file it in the download store and read it.
 
-        # Check if new file was downloaded
-        excel_files = [f for f in os.listdir(download_dir) if f.endswith('.xlsx')]
-        if not excel_files:
-            raise FileNotFoundError("No Excel file was downloaded after waiting")
-            
-        # Get and process the latest file
-        latest_file = max(
-            [os.path.join(download_dir, f) for f in excel_files],
-            key=os.path.getctime
-        )
-        
-        # Verify file exists and is readable
-        if not os.path.exists(latest_file):
-            raise FileNotFoundError(f"Downloaded file not found: {latest_file}")
-            
-        df = pd.read_excel(latest_file)
+    `before` is a download_snapshot() taken before the download was triggered;
+    without one, whatever loose Excel files are in download_dir are filed away
+    first and the next file to land is used. Returns the DataFrame and the
+    template's path inside the store.
+    """
+    try:
+        store = DownloadStore(download_dir)
+        if before is None:
+            # Files already here (older downloads, samples) are copied into the store and left alone
+            store.sweep(TEMPLATE_KIND)
+            before = download_snapshot(download_dir)
+
+        # Wait for the new download to finish
+        latest_file = wait_for_new_download(download_dir, before, timeout=DOWNLOAD_TIMEOUT)
+        record, is_new = store.ingest(latest_file, TEMPLATE_KIND)
+        template_path = store.path(record)
+
+        df = frame_cache.read_excel(template_path, skip_blank=False)
         if df.empty:
             raise ValueError("Excel file is empty")
-            
-        items = df.to_dict('records')
-        log(f"Successfully read {len(items)} items from Excel file")
-        return items, latest_file
+
+        # Old templates are never needed again; keep a couple for inspection
+        store.prune(TEMPLATE_KIND, keep=TEMPLATES_KEPT)
+
+        log(f"Successfully read {len(df)} items from Excel file"
+            + ("" if is_new else " (same content as an earlier download)"))
+        return df, template_path
 
     except Exception as e:
         log(f"❌ Error reading Excel file: {e}")
         raise
 
-def update_excel_with_sheet_data(excel_data, sheet_data, excel_file_path):
-    """Update Excel data with values from Google Sheet and save back to Excel."""
-    try:
-        if not excel_data:
-            raise ValueError("No data in Excel file")
-        if not sheet_data:
-            raise ValueError("No data from Google Sheet")
-            
-        updated_data = []
-        for excel_item in excel_data:
-            # Find matching item from sheet data
-            matching_item = next(
-                (item for item in sheet_data if 
-                item['Design No.'] == excel_item['Item Name'] 
-                and item['Color'] == excel_item['Color Name'] 
-                and is_size_in_group(excel_item['Size Name'], item['Size'])),
-                None
-            )
-            
-            if matching_item:
-                # Update Stock Qty and Cost price
-                excel_item['Stock Qty'] = matching_item['Qty']
-                excel_item['Cost price'] = matching_item['Price']
-                log(f"Updated item: {excel_item['Item Name']} - {excel_item['Color Name']} - {excel_item['Size Name']} (matched with size group {matching_item['Size']})")
-            # else:
-                # log(f"No match found for: {excel_item['Item Name']} - {excel_item['Color Name']} - {excel_item['Size Name']}")
-            
-            updated_data.append(excel_item)
-            
-        # Convert updated data back to DataFrame and save to Excel
-        df = pd.DataFrame(updated_data)
-        df.to_excel(excel_file_path, index=False)
-        log(f"Updated Excel file saved: {excel_file_path}")
-            
-        log(f"Updated {len(updated_data)} items with sheet data")
-        # return updated_data
-        
-    except Exception as e:
-        log(f"❌ Error updating data: {e}")
-        raise
+SHEET_KEY_COLUMNS = ['Item Name', 'Color Name', 'size_key']
+
+def sheet_items_to_frame(sheet_data):
+    """Build a DataFrame from SheetItems, keeping the sheet order."""
+    sheet_data = list(sheet_data)
+    return pd.DataFrame({
+        'Design No.': [item.design_no for item in sheet_data],
+        'Color': [item.color for item in sheet_data],
+        'Size': [item.size for item in sheet_data],
+        'size_start': np.fromiter((item.size_group[0] for item in sheet_data), dtype=np.int64, count=len(sheet_data)),
+        'size_end': np.fromiter((item.size_group[1] for item in sheet_data), dtype=np.int64, count=len(sheet_data)),
+        'Qty': [item.qty for item in sheet_data],
+        'Price': [item.price for item in sheet_data],
+    })
+
+def expand_size_groups(sheet_df):
+    """Expand every sheet row into one row per integer size of its size group.
+
+    '38-44' becomes 38, 39, ..., 44. Duplicate (design, color, size) keys keep
+    the earliest sheet row, which matches the first-match rule of the row loop.
+    """
+    starts = sheet_df['size_start'].to_numpy(dtype=np.int64)
+    ends = sheet_df['size_end'].to_numpy(dtype=np.int64)
+    counts = np.maximum(ends - starts + 1, 0)
+    too_wide = counts > MAX_SIZE_GROUP_SPAN
+    if too_wide.any():
+        groups = sheet_df['Size'][too_wide].astype(str).unique()[:5]
+        raise ValueError(f"Size groups wider than {MAX_SIZE_GROUP_SPAN} sizes: {', '.join(groups)}")
+
+    rows = np.repeat(np.arange(len(sheet_df)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    expanded = pd.DataFrame({
+        'Item Name': sheet_df['Design No.'].to_numpy(dtype=object)[rows],
+        'Color Name': sheet_df['Color'].to_numpy(dtype=object)[rows],
+        'size_key': (starts[rows] + offsets).astype(np.float64),
+        'Stock Qty': sheet_df['Qty'].to_numpy()[rows],
+        'Cost price': sheet_df['Price'].to_numpy()[rows],
+    })
+    return expanded.drop_duplicates(SHEET_KEY_COLUMNS, keep='first')
+
+def reconcile_stock_frame(excel_df, sheet_df):
+    """Write sheet Qty/Price into the template's Stock Qty and Cost price columns.
+
+    Joins the template on Item Name/Color Name/rounded Size Name against the
+    expanded size groups and replaces both columns in one go. excel_df is
+    updated in place; the boolean mask of matched rows is returned.
+    """
+    expanded = expand_size_groups(sheet_df)
+
+    keys = excel_df[['Item Name', 'Color Name']].astype(object)
+    keys['size_key'] = np.round(pd.to_numeric(excel_df['Size Name'], errors='coerce'))
+    joined = keys.merge(expanded, on=SHEET_KEY_COLUMNS, how='left',
+                        validate='many_to_one', indicator=True)
+
+    matched = (joined['_merge'] == 'both').to_numpy()
+    for column in ('Stock Qty', 'Cost price'):
+        excel_df[column] = np.where(
+            matched,
+            joined[column].to_numpy(dtype=object),
+            excel_df[column].to_numpy(dtype=object)
+        )
+    return pd.Series(matched, index=excel_df.index)
 
 def split_sheet_data(sheet_data):
     """Split sheet data into stock in and stock out items."""
@@ -233,142 +265,371 @@ def split_sheet_data(sheet_data):
     
     for item in sheet_data:
         # log(item)
-        if item['Stock In / Out'].lower() == 'stock in':
+        if item.direction == 'in':
             stock_in_items.append(item)
-        elif item['Stock In / Out'].lower() == 'stock out':
+        elif item.direction == 'out':
             stock_out_items.append(item)
     
     log(f"Split sheet data: {len(stock_in_items)} items for stock in, {len(stock_out_items)} items for stock out")
     return stock_in_items, stock_out_items
 
-def clear_excel_data(excel_file_path):
-    """Clear quantity and price columns in the Excel file."""
-    try:
-        df = pd.read_excel(excel_file_path)
-        # Clear Stock Qty and Cost price columns
-        df['Stock Qty'] = ''
-        df['Cost price'] = ''
-        # Save back to the same file
-        df.to_excel(excel_file_path, index=False)
-        log("Cleared quantity and price columns in Excel file")
-    except Exception as e:
-        log(f"❌ Error clearing Excel data: {e}")
-        raise
+def clear_stock_columns(excel_df):
+    """Clear quantity and price columns of a template DataFrame in memory."""
+    excel_df['Stock Qty'] = ''
+    excel_df['Cost price'] = ''
+    return excel_df
+
+def import_file_path(download_dir, stock_type, part=None):
+    """Path of the generated import workbook for a stock type (and chunk number).
 
-def get_or_download_template(driver, download_dir):
-    """Get existing template or download new one if none exists."""
-    excel_files = [f for f in os.listdir(download_dir) if f.endswith('.xlsx')]
-    if excel_files:
-        # Get the existing file
-        excel_file_path = max(
-            [os.path.join(download_dir, f) for f in excel_files],
-            key=os.path.getctime
+    Kept in a subfolder so the downloaded template itself is never overwritten.
+    """
+    import_dir = os.path.join(download_dir, "import")
+    os.makedirs(import_dir, exist_ok=True)
+    suffix = f"_part{part}" if part is not None else ""
+    return os.path.join(import_dir, f"{stock_type.lower().replace(' ', '_')}{suffix}.xlsx")
+
+def _item_keys(designs, colors):
+    """(design, color) pairs with blank/NaN colours as '' so both sides compare alike."""
+    colors = pd.Series(colors, dtype=object).fillna('').astype(str).str.strip()
+    colors = colors.mask(colors.str.lower().isin(['nan', 'none']), '')
+    return zip(pd.Series(designs, dtype=object).astype(str).str.strip(), colors)
+
+def missing_template_items(excel_df, sheet_df):
+    """Return sheet (Design No., Color) pairs that have no row in the template."""
+    template_keys = set(_item_keys(excel_df['Item Name'], excel_df['Color Name']))
+    sheet_keys = _item_keys(sheet_df['Design No.'], sheet_df['Color'])
+    return sorted({key for key in sheet_keys if key not in template_keys}, key=str)
+
+def get_or_download_template(driver, download_dir, sheet_df=None, open_dialog=None):
+    """Get the cached template or download a new one if it is missing or stale.
+
+    Returns the template as a DataFrame together with its file path. When
+    sheet_df is given and a cached template lacks some of its items (e.g. a
+    new item added in FronoCloud), the template is downloaded again if it is
+    older than TEMPLATE_REFRESH_AFTER; otherwise the items are logged as
+    unmatched. open_dialog is called first when the import dialog isn't open yet.
+    """
+    cached = template_cache.get(download_dir)
+    if cached is not None:
+        excel_df, excel_file_path = cached
+        missing = missing_template_items(excel_df, sheet_df) if sheet_df is not None else []
+        if not missing:
+            log("Using cached template file")
+            return excel_df, excel_file_path
+        examples = ", ".join(map(str, missing[:5]))
+        if template_cache.age(excel_file_path) < TEMPLATE_REFRESH_AFTER:
+            log(f"⚠️ {len(missing)} sheet items are not in the template and stay unmatched: {examples}")
+            return excel_df, excel_file_path
+        log(f"Template is missing {len(missing)} sheet items (e.g. {examples}), downloading a fresh copy")
+        template_cache.invalidate(download_dir)
+
+    # Download new template
+    if open_dialog is not None:
+        open_dialog()
+    before = download_snapshot(download_dir)
+    wait_and_click(driver, "//button[contains(text(), 'Download Item File')]")
+    excel_df, excel_file_path = read_excel_frame(download_dir, before)
+    template_cache.put(excel_file_path, excel_df)
+    log("Downloaded new template file")
+    missing = missing_template_items(excel_df, sheet_df) if sheet_df is not None else []
+    if missing:
+        log(f"⚠️ {len(missing)} sheet items are not in the template and stay unmatched: "
+            f"{', '.join(map(str, missing[:5]))}")
+    return excel_df, excel_file_path
+
+def open_import_dialog(driver, stock_type):
+    """Open the "Import Item Stock" dialog for Stock In or Stock Out."""
+    # Switch to appropriate stock type
+    wait_and_click(driver, f"//select[@id='basicSelect']/option[text()='{stock_type}']")
+    wait_for_page_ready(driver, "select stock type")
+    
+    # Click Add New Stock button
+    wait_and_click(driver, "//button[contains(text(), ' Add New Stock')]")
+    wait_for_page_ready(driver, "add new stock")
+    
+    # Open menu and select Import Item Stock
+    wait_and_click(driver, "//*[@data-original-title='Menu']")
+    wait_and_click(driver, "//a[contains(text(), 'Import Item Stock')]")
+    wait_for_present(driver, "import dialog", By.ID, "stockitemimport")
+
+def upload_with_browser(driver, excel_file_path, stock_type):
+    """Upload the import workbook through the open import dialog.
+
+    Raises FronoImportError unless FronoCloud shows a success toast.
+    """
+    log(f"Uploading {stock_type.lower()} file...")
+    file_input = wait_for_present(driver, "import file input", By.ID, "stockitemimport")
+    file_path = os.path.abspath(excel_file_path)
+    file_input.send_keys(file_path)
+    log(f"Uploaded {stock_type.lower()} file: {excel_file_path}")
+    
+    # Click upload button
+    wait_and_click(driver, "//button[contains(text(), 'Upload file')]")
+    message = wait_for_toast(driver, f"{stock_type.lower()} upload")
+    if message and any(word in message.lower() for word in IMPORT_ERROR_WORDS):
+        raise FronoImportError(f"{stock_type} upload rejected: {message}")
+    # Only a success toast counts: a missing one may mean the upload was dropped
+    if not message or not IMPORT_SUCCESS_PATTERN.search(message):
+        raise FronoImportError(
+            f"{stock_type} upload not confirmed ({message or 'no message'}), check FronoCloud before retrying"
         )
-        excel_data = pd.read_excel(excel_file_path).to_dict('records')
-        log("Using existing template file")
-        return excel_data, excel_file_path
-    else:
-        # Download new template
-        wait_and_click(driver, "//button[contains(text(), 'Download Item File')]")
-        time.sleep(DEFAULT_DELAY + 1)
-        excel_data, excel_file_path = read_excel_data(download_dir)
-        log("Downloaded new template file")
-        return excel_data, excel_file_path
-
-def process_stock(driver, stock_items, download_dir, stock_type):
-    """Process stock in or stock out items based on stock_type."""
+    return message
+
+def upload_import_file(driver, http_client, excel_file_path, stock_type, ensure_dialog):
+    """Upload over HTTP when a client is given, through the browser otherwise.
+
+    The browser is only a fallback when the HTTP import certainly did not
+    apply: the connection never got through, or FronoCloud rejected the file
+    (4xx or an error payload). A read timeout or a 5xx may have imported the
+    file already, so those fail the run for someone to check FronoCloud.
+    """
+    if http_client is not None:
+        try:
+            return http_client.import_stock(excel_file_path, stock_type)
+        except FronoImportError as e:
+            if not e.rejected:
+                log(f"❌ HTTP import outcome unknown, check FronoCloud before retrying: {e}")
+                raise
+            log(f"⚠️ HTTP import rejected, falling back to the browser: {e}")
+        except requests.RequestException as e:
+            if not request_not_sent(e):
+                log(f"❌ HTTP import outcome unknown, check FronoCloud before retrying: {e}")
+                raise
+            log(f"⚠️ Could not reach the HTTP import API, falling back to the browser: {e}")
+    ensure_dialog()
+    return upload_with_browser(driver, excel_file_path, stock_type)
+
+def import_snapshot_name(stock_type):
+    return f"last_import_{stock_type.lower().replace(' ', '_')}"
+
+def _line_number(value):
+    """A qty or price as a float rounded to 6 places, None for blanks, so '350.50' equals 350.5."""
     try:
-        # Switch to appropriate stock type
-        wait_and_click(driver, f"//select[@id='basicSelect']/option[text()='{stock_type}']")
-        time.sleep(DEFAULT_DELAY + 1)
-        
-        # Click Add New Stock button
-        wait_and_click(driver, "//button[contains(text(), ' Add New Stock')]")
-        time.sleep(DEFAULT_DELAY + 1)
-        
-        # Open menu and select Import Item Stock
-        wait_and_click(driver, "//*[@data-original-title='Menu']")
-        wait_and_click(driver, "//a[contains(text(), 'Import Item Stock')]")
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else round(number, 6)
+
+def _line_values(qty, price):
+    return [_line_number(qty), _line_number(price)]
+
+def snapshot_line(value):
+    """Normalise a stored snapshot value; older snapshots hold "qty|price" strings."""
+    if isinstance(value, str):
+        return _line_values(*(value.split('|', 1) + [''])[:2])
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        return _line_values(*value)
+    return None
+
+def import_lines(excel_df, matched):
+    """(item, color, size) -> [qty, price] for every template row carrying sheet values."""
+    rows = excel_df[matched.to_numpy()]
+    keys = (rows['Item Name'].astype(str) + '|' + rows['Color Name'].astype(str)
+            + '|' + rows['Size Name'].astype(str))
+    values = [
+        _line_values(qty, price)
+        for qty, price in zip(rows['Stock Qty'].to_numpy(dtype=object), rows['Cost price'].to_numpy(dtype=object))
+    ]
+    return pd.Series(values, index=keys.to_numpy(), dtype=object)
+
+def delta_import_mask(excel_df, matched, previous):
+    """Rows whose (qty, price) are new or differ numerically from the last successful import."""
+    lines = import_lines(excel_df, matched)
+    changed = np.fromiter(
+        (snapshot_line(previous.get(key)) != value for key, value in lines.items()),
+        dtype=bool, count=len(lines)
+    )
+    mask = np.zeros(len(excel_df), dtype=bool)
+    mask[np.flatnonzero(matched.to_numpy())[changed]] = True
+    return pd.Series(mask, index=excel_df.index)
+
+def import_progress_name(stock_type):
+    return f"import_progress_{stock_type.lower().replace(' ', '_')}"
+
+def import_batch_id(import_df, chunk_rows):
+    """Identify a batch by its content and chunking so a resume only skips identical chunks."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(import_df, index=False).to_numpy().tobytes())
+    digest.update(str(chunk_rows).encode())
+    return digest.hexdigest()[:16]
+
+def split_import_chunks(import_df, chunk_rows=None):
+    """Split the import lines into consecutive frames of at most chunk_rows rows."""
+    chunk_rows = max(1, chunk_rows or IMPORT_CHUNK_ROWS)
+    return [import_df.iloc[start:start + chunk_rows] for start in range(0, len(import_df), chunk_rows)]
+
+def process_stock(driver, stock_items, download_dir, stock_type, http_client=None,
+                  location=None, full_resync=False):
+    """Process stock in or stock out items based on stock_type.
+
+    The template is parsed once, cleared and filled in memory, and an import
+    workbook holding only the template rows that carry sheet values is
+    written right before the upload. With an http_client the
+    workbook is posted straight to the import API and the browser is only used
+    to download a stale template or when the HTTP upload fails.
+
+    With a location, only lines that are new or changed since the last
+    successful import for that location and stock type are uploaded, unless
+    full_resync is set or there is no previous import on record.
+    Batches above IMPORT_CHUNK_ROWS lines are uploaded in chunks. Each confirmed
+    chunk's lines are merged into the last-import snapshot right away, so a
+    retry never re-sends them; an identical batch (e.g. a full resync) resumes
+    from the next chunk.
+    """
+    timer = StageTimer(f"{stock_type} import")
+    dialog_open = False
+
+    def ensure_dialog():
+        nonlocal dialog_open
+        if not dialog_open:
+            open_import_dialog(driver, stock_type)
+            dialog_open = True
+
+    try:
+        if http_client is None:
+            with timer.stage("open import dialog"):
+                ensure_dialog()
         
-        # Check for existing template
-        excel_files = [f for f in os.listdir(download_dir) if f.endswith('.xlsx')]
-        if not excel_files:
-            # Download new template if none exists
-            wait_and_click(driver, "//button[contains(text(), 'Download Item File')]")
-            time.sleep(DEFAULT_DELAY + 1)
-            excel_data, excel_file_path = read_excel_data(download_dir)
-            log("Downloaded new template file")
-        else:
-            # Use existing template
-            excel_file_path = max(
-                [os.path.join(download_dir, f) for f in excel_files],
-                key=os.path.getctime
+        sheet_df = sheet_items_to_frame(stock_items)
+        with timer.stage("read template"):
+            # Get cached template or download a new one
+            excel_df, _ = get_or_download_template(
+                driver, download_dir, sheet_df, open_dialog=ensure_dialog
             )
-            excel_data = pd.read_excel(excel_file_path).to_dict('records')
-            log("Using existing template file")
-        
-        # Clear existing data
-        clear_excel_data(excel_file_path)
         
-        # Update Excel with stock data
-        update_excel_with_sheet_data(excel_data, stock_items, excel_file_path)
+        with timer.stage("fill template"):
+            # Clear existing data and fill in the stock data
+            clear_stock_columns(excel_df)
+            matched = reconcile_stock_frame(excel_df, sheet_df)
+            log(f"Updated {int(matched.sum())} of {len(excel_df)} items with sheet data")
+
+            # Work out the delta against the last successful import
+            snapshot = import_lines(excel_df, matched)
+            stored = load_state(location, import_snapshot_name(stock_type)) if location else None
+            previous = None if full_resync else stored
+            delta = None
+            if previous is not None:
+                delta = delta_import_mask(excel_df, matched, previous)
+                log(f"Delta import: {int(delta.sum())} of {int(matched.sum())} lines are new or changed")
+            elif location:
+                log("Full import: " + ("resync requested" if full_resync else "no previous import on record"))
+
+        if delta is not None and not delta.any():
+            log(f"✅ Nothing new to import for {stock_type.lower()}")
+            return
         
-        # Upload the updated file
-        time.sleep(2)
-        log(f"Uploading {stock_type.lower()} file...")
-        file_input = driver.find_element(By.ID, "stockitemimport")
-        file_path = os.path.abspath(excel_file_path)
-        file_input.send_keys(file_path)
-        log(f"Uploaded {stock_type.lower()} file: {excel_file_path}")
-        
-        # Click upload button
-        wait_and_click(driver, "//button[contains(text(), 'Upload file')]")
-        time.sleep(DEFAULT_DELAY + 2)
+        # Lines that actually go out, in one file or in chunks alike: unmatched
+        # template rows carry nothing, and with a delta only new or changed lines
+        import_mask = delta if delta is not None else matched
+        import_df = excel_df[import_mask.to_numpy()]
+        import_rows = len(import_df)
+
+        if import_rows <= IMPORT_CHUNK_ROWS:
+            with timer.stage("write import file"):
+                excel_file_path = import_file_path(download_dir, stock_type)
+                write_import_workbook(import_df, excel_file_path, mode="stream")
+            
+            with timer.stage("upload"):
+                upload_import_file(driver, http_client, excel_file_path, stock_type, ensure_dialog)
+        else:
+            chunks = split_import_chunks(import_df)
+            batch_id = import_batch_id(import_df, IMPORT_CHUNK_ROWS)
+
+            # Lines FronoCloud has confirmed so far; grows with every chunk
+            applied = dict(stored or {})
+
+            # Resume after the last chunk FronoCloud confirmed for this exact batch
+            progress = load_state(location, import_progress_name(stock_type)) if location else None
+            done = progress["done"] if progress and progress.get("batch") == batch_id else 0
+            if done:
+                log(f"Resuming {stock_type.lower()} import at chunk {done + 1} of {len(chunks)}")
+            else:
+                log(f"Importing {import_rows} lines in {len(chunks)} chunks of up to {IMPORT_CHUNK_ROWS}")
+
+            for part in range(done, len(chunks)):
+                with timer.stage(f"chunk {part + 1}/{len(chunks)}"):
+                    if part > done and dialog_open:
+                        # The dialog closes after an upload; start the next one from a fresh page
+                        driver.refresh()
+                        wait_for_page_ready(driver, "refresh")
+                        dialog_open = False
+                    excel_file_path = import_file_path(download_dir, stock_type, part + 1)
+                    write_import_workbook(chunks[part], excel_file_path, mode="stream")
+                    upload_import_file(driver, http_client, excel_file_path, stock_type, ensure_dialog)
+                    os.remove(excel_file_path)
+                if location:
+                    # Record the chunk's lines as imported before anything else, so a
+                    # retry's delta leaves them out even if the sheet changed meanwhile
+                    applied.update(import_lines(chunks[part], pd.Series(True, index=chunks[part].index)))
+                    save_state(location, import_snapshot_name(stock_type), applied)
+                    save_state(location, import_progress_name(stock_type), {
+                        "batch": batch_id, "chunks": len(chunks), "done": part + 1
+                    })
+
+        if location:
+            save_state(location, import_snapshot_name(stock_type), snapshot.to_dict())
+            clear_state(location, import_progress_name(stock_type))
         
     except Exception as e:
         log(f"❌ Error during {stock_type.lower()} process: {e}")
         raise
 
-def stockInItem(location):
-    username, password = load_credentials(location)
-    
+    finally:
+        timer.report()
+
+def stockInItem(location, force=False, full_resync=False):
+    """Run the stock in/out import for a location.
+
+    Returns "Error: ..." on failure and "No changes" when the items sheet is the
+    same as on the last successful run (pass force=True to run anyway).
+    Only lines changed since the last import are uploaded unless full_resync.
+    """
+    # Only configured locations ever become a path
+    if unknown_locations([location]):
+        return f"Error: Unknown location {location!r}"
+
     # Create download directory if it doesn't exist
     download_dir = os.path.join(os.getcwd(), location, "stock_in_data")
     os.makedirs(download_dir, exist_ok=True)
-    
-    driver = create_driver(download_path=download_dir)
 
     try:
-        login(driver, username, password)
-
-        log("Navigating to Items page...")
-        time.sleep(DEFAULT_DELAY)
-        driver.get(driver.current_url.replace("/dashboard", "/stockinout"))
-        
-        # Get data from Google Sheet
-        sheet_data = fetch_items_from_sheet()
+        # Get data from Google Sheet before paying for a browser session
+        values = fetch_sheet_values()
+        fingerprint = sheet_fingerprint(values)
+        if not (force or full_resync) and not sheet_changed(location, fingerprint):
+            log("✅ Items sheet unchanged since the last successful run, nothing to do")
+            return "No changes"
+
+        sheet_data = parse_sheet_values(values)
         if not sheet_data:
             raise ValueError("No data received from Google Sheet")
+        log(f"Successfully fetched {len(sheet_data)} items from Google Sheet")
             
         # Split data into stock in and stock out
         stock_in_items, stock_out_items = split_sheet_data(sheet_data)
 
+        # Reuse the browser's login for direct API uploads when enabled; its connections close with the run
+        with browser_session(location, download_dir) as driver, \
+                (FronoHttpClient.from_driver(driver) if http_import_enabled() else nullcontext()) as http_client:
 # =====================================================================================
-        # Process stock in items if any exist
-        if stock_in_items:
-            log("Processing stock in items...")
-            process_stock(driver, stock_in_items, download_dir, "Stock In")
-        
-        # refresh the page
-        driver.refresh()
-        time.sleep(DEFAULT_DELAY + 2)
-
-        # Process stock out items if any exist
-        if stock_out_items:
-            log("Processing stock out items...")
-            process_stock(driver, stock_out_items, download_dir, "Stock Out")
-# =====================================================================================
+            # Process stock in items if any exist
+            if stock_in_items:
+                log("Processing stock in items...")
+                process_stock(driver, stock_in_items, download_dir, "Stock In", http_client,
+                              location=location, full_resync=full_resync)
             
+            # refresh the page
+            driver.refresh()
+            wait_for_page_ready(driver, "refresh")
+
+            # Process stock out items if any exist
+            if stock_out_items:
+                log("Processing stock out items...")
+                process_stock(driver, stock_out_items, download_dir, "Stock Out", http_client,
+                              location=location, full_resync=full_resync)
+# =====================================================================================
+
+        save_state(location, "sheet_fingerprint", fingerprint)
         log("✅ Stock in/out process completed successfully")
         
     except Exception as e:
@@ -376,5 +637,4 @@ def stockInItem(location):
         return f"Error: {e}"
 
     finally:
-        log("Closing browser...")
-        driver.quit()
+        latency_tracker.save()
@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from scripts.helper.common_utils import capture_run_logs, configured_locations, log, unknown_locations
+
+
+# Locations processed at the same time, each in its own worker process
+MAX_PARALLEL_LOCATIONS = int(os.environ.get("FRONO_MAX_PARALLEL_LOCATIONS", 2))
+
+# One single-worker process per location, so a location's warm browser session lives in exactly one place
+_executors = {}
+_executor_lock = threading.Lock()
+# Caps the locations running at once across all requests and jobs
+_running_slots = threading.BoundedSemaphore(max(1, MAX_PARALLEL_LOCATIONS))
+# One run per location at a time, however many requests or jobs ask for it
+_location_locks = {}
+_location_locks_guard = threading.Lock()
+
+
+def _get_executor(location):
+    # Workers live as long as the web process so their warm browser sessions are reused
+    with _executor_lock:
+        executor = _executors.get(location)
+        if executor is None:
+            executor = _executors[location] = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            )
+        return executor
+
+def _discard_executor(location):
+    with _executor_lock:
+        executor = _executors.pop(location, None)
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def shutdown_runner():
+    with _executor_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def run_location(location, force=False, full_resync=False):
+    """Run stockInItem for one location and report how it went. Runs in a worker process."""
+    import scripts.stock_in_excel as stock_processor
+
+    start = time.time()
+    with capture_run_logs() as logs:
+        try:
+            result = stock_processor.stockInItem(location, force=force, full_resync=full_resync)
+            error = result if isinstance(result, str) and result.startswith("Error") else None
+        except Exception as e:
+            result, error = None, f"Error: {e}"
+    return {
+        "location": location,
+        "status": "failed" if error else "succeeded",
+        "error": error,
+        "seconds": round(time.time() - start, 2),
+        "logs": logs.snapshot(),
+    }
+
+def _location_lock(location):
+    with _location_locks_guard:
+        return _location_locks.setdefault(location, threading.Lock())
+
+def run_locations(locations=None, max_workers=None, force=False, full_resync=False):
+    """Run several locations concurrently and return {location: result}.
+
+    Each location runs in its own long-lived worker process, with its own
+    driver and download directory, and at most FRONO_MAX_PARALLEL_LOCATIONS
+    run at once. With max_workers, a throwaway pool of that size is used.
+    """
+    locations = list(dict.fromkeys(locations or configured_locations()))
+    if not locations:
+        raise ValueError("No locations to run")
+    unknown = unknown_locations(locations)
+    if unknown:
+        raise ValueError(f"Unknown locations: {', '.join(map(repr, unknown))}")
+
+    # Sorted acquisition so overlapping location sets can't deadlock
+    locks = [_location_lock(location) for location in sorted(locations)]
+    for lock in locks:
+        lock.acquire()
+    try:
+        return _run_locations(locations, max_workers, force, full_resync)
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+
+def _run_locations(locations, max_workers, force, full_resync):
+    start = time.time()
+    log(f"Running stock in/out for {', '.join(locations)}...")
+    if max_workers:
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        futures = {location: executor.submit(run_location, location, force, full_resync) for location in locations}
+    else:
+        futures = {}
+        for location in locations:
+            # Waits here while FRONO_MAX_PARALLEL_LOCATIONS locations are running
+            _running_slots.acquire()
+            try:
+                future = _get_executor(location).submit(run_location, location, force, full_resync)
+            except Exception:
+                _running_slots.release()
+                raise
+            future.add_done_callback(lambda _: _running_slots.release())
+            futures[location] = future
+
+    results = {}
+    for location, future in futures.items():
+        try:
+            results[location] = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool) and not max_workers:
+                # A crashed worker (e.g. Chrome OOM) breaks its pool; start a new one next time
+                _discard_executor(location)
+            results[location] = {
+                "location": location, "status": "failed", "error": f"Error: {e}",
+                "seconds": round(time.time() - start, 2), "logs": [],
+            }
+        status = "✅" if results[location]["status"] == "succeeded" else "❌"
+        log(f"{status} {location}: {results[location]['status']} in {results[location]['seconds']}s")
+
+    if max_workers:
+        executor.shutdown(wait=False)
+    log(f"All locations finished in {time.time() - start:.2f}s")
+    return results
@@ -0,0 +1,136 @@
+"""FronoHttpClient and the browser fallback against a local stand-in for FronoCloud.
+
+    python -m pytest tests/test_frono_http.py
+"""
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import scripts.stock_in_excel as stock
+from scripts.helper.frono_http import FronoHttpClient, FronoImportError
+
+
+IMPORT_PATH = "/api/stock/import"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answer every import with the server's current (status, body, delay)."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        status, body, delay = self.server.reply
+        time.sleep(delay)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FronoHttpFallbackTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        fd, cls.workbook = tempfile.mkstemp(suffix=".xlsx")
+        os.close(fd)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        os.remove(cls.workbook)
+
+    def setUp(self):
+        self.server.requests = 0
+        self.browser_uploads = []
+        self.dialogs = []
+        original = stock.upload_with_browser
+        stock.upload_with_browser = lambda driver, path, stock_type: self.browser_uploads.append(path) or "browser"
+        self.addCleanup(setattr, stock, "upload_with_browser", original)
+
+    def reply(self, status, body=None, delay=0):
+        self.server.reply = (status, body if body is not None else {}, delay)
+
+    def upload(self, base_url=None, timeout=5):
+        with FronoHttpClient(base_url or self.base_url, timeout=timeout, import_path=IMPORT_PATH) as client:
+            return stock.upload_import_file(
+                None, client, self.workbook, "Stock In", lambda: self.dialogs.append(True)
+            )
+
+    def test_accepted_import_stays_on_http(self):
+        self.reply(200, {"success": True})
+        self.assertEqual(self.upload(), {"success": True})
+        self.assertEqual(self.browser_uploads, [])
+
+    def test_client_error_falls_back_to_browser(self):
+        self.reply(400, {"message": "bad file"})
+        self.assertEqual(self.upload(), "browser")
+        self.assertEqual(self.browser_uploads, [self.workbook])
+        self.assertEqual(self.dialogs, [True])
+
+    def test_rejected_payload_falls_back_to_browser(self):
+        self.reply(200, {"success": False, "message": "invalid rows"})
+        self.assertEqual(self.upload(), "browser")
+        self.assertEqual(self.browser_uploads, [self.workbook])
+
+    def test_server_error_may_have_applied_and_raises(self):
+        self.reply(500, {"message": "oops"})
+        with self.assertRaises(FronoImportError) as caught:
+            self.upload()
+        self.assertFalse(caught.exception.rejected)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.browser_uploads, [])
+
+    def test_read_timeout_may_have_applied_and_raises(self):
+        self.reply(200, {"success": True}, delay=1.0)
+        with self.assertRaises(requests.ReadTimeout):
+            self.upload(timeout=0.2)
+        # A POST is never replayed: the first one may already have imported the stock
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.browser_uploads, [])
+
+    def test_refused_connection_falls_back_to_browser(self):
+        self.assertEqual(self.upload(base_url=f"http://127.0.0.1:{closed_port()}"), "browser")
+        self.assertEqual(self.browser_uploads, [self.workbook])
+
+    def test_unconfigured_import_path_falls_back_to_browser(self):
+        with FronoHttpClient(self.base_url, import_path="") as client:
+            self.assertEqual(
+                stock.upload_import_file(None, client, self.workbook, "Stock In", lambda: None), "browser"
+            )
+        self.assertEqual(self.server.requests, 0)
+
+    def test_context_manager_closes_the_session(self):
+        client = FronoHttpClient(self.base_url, import_path=IMPORT_PATH)
+        closed = []
+        client.session.close = lambda: closed.append(True)
+        with client:
+            pass
+        self.assertEqual(closed, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()